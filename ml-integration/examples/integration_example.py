@@ -5,13 +5,14 @@ Shows how to integrate ml_detector.py with the core detector
 
 import sys
 from pathlib import Path
+from typing import List
 
 # Add paths
 sys.path.append(str(Path(__file__).parent.parent / 'src'))
 sys.path.append(str(Path(__file__).parent))
 
 from codebase_csi.core.detector import CodebaseDetector
-from ml_detector import MLDetector, EnsembleDetector
+from ml_detector import MLDetector, EnsembleDetector, EnsembleResult
 
 
 class EnhancedDetector:
@@ -19,13 +20,20 @@ class EnhancedDetector:
     Enhanced detector that combines rule-based (v1.1) with ML (v2.0).
     """
     
-    def __init__(self, ml_model_path: str = None, use_ml: bool = True):
+    def __init__(
+        self,
+        ml_model_path: str = None,
+        use_ml: bool = True,
+        ml_cache_path: str = None
+    ):
         """
         Initialize enhanced detector.
         
         Args:
             ml_model_path: Path to trained ML model (optional)
             use_ml: Whether to use ML (False = rule-based only)
+            ml_cache_path: Persist the ML tokenization cache here so later
+                runs (e.g. CI with a restored cache) skip unchanged files
         """
         # Initialize core rule-based detector
         self.rule_detector = CodebaseDetector()
@@ -37,7 +45,8 @@ class EnhancedDetector:
                 self.ml_detector = MLDetector(
                     model_path=ml_model_path,
                     device='cpu',
-                    use_quantization=True
+                    use_quantization=True,
+                    cache_path=ml_cache_path
                 )
                 print(f"✅ ML detector loaded from {ml_model_path}")
             except Exception as e:
@@ -59,44 +68,72 @@ class EnhancedDetector:
         Returns:
             Enhanced results with both rule-based and ML scores
         """
-        # Get rule-based analysis
-        rule_result = self.rule_detector.analyze_file(file_path)
+        return self.analyze_files([file_path])[0]
+    
+    def analyze_files(self, file_paths: List[str], batch_size: int = 16) -> List[dict]:
+        """
+        Analyze several files, batching the ML forward pass.
         
-        # Read code
-        with open(file_path, 'r', encoding='utf-8') as f:
-            code = f.read()
+        Args:
+            file_paths: Paths to code files
+            batch_size: Files per ML forward pass
         
-        # Get individual analyzer scores
-        rule_scores = {
-            'pattern': rule_result['patterns']['confidence'],
-            'statistical': rule_result['statistical']['confidence'],
-            'security': rule_result['security']['confidence'],
-            'emoji': rule_result['emoji']['confidence'],
-            'semantic': rule_result.get('semantic', {}).get('confidence', 0.0),
-            'architectural': rule_result.get('architectural', {}).get('confidence', 0.0),
-        }
+        Returns:
+            Enhanced results, one per file, in input order
+        """
+        rule_results = []
+        samples = []
+        
+        for file_path in file_paths:
+            # Get rule-based analysis
+            rule_result = self.rule_detector.analyze_file(file_path)
+            rule_results.append(rule_result)
+            
+            # Read code
+            with open(file_path, 'r', encoding='utf-8') as f:
+                code = f.read()
+            
+            # Get individual analyzer scores
+            rule_scores = {
+                'pattern': rule_result['patterns']['confidence'],
+                'statistical': rule_result['statistical']['confidence'],
+                'security': rule_result['security']['confidence'],
+                'emoji': rule_result['emoji']['confidence'],
+                'semantic': rule_result.get('semantic', {}).get('confidence', 0.0),
+                'architectural': rule_result.get('architectural', {}).get('confidence', 0.0),
+            }
+            samples.append({'code': code, 'file_path': file_path, 'rule_scores': rule_scores})
         
-        # Get ensemble prediction
-        ensemble_result = self.ensemble.predict(code, file_path, rule_scores)
+        # Get ensemble predictions
+        ensemble_results = self.ensemble.predict_batch(samples, batch_size=batch_size)
+        if self.ml_detector is not None:
+            self.ml_detector.save_cache()
         
+        return [
+            self._enhance(rule_result, ensemble_result)
+            for rule_result, ensemble_result in zip(rule_results, ensemble_results)
+        ]
+    
+    def _enhance(self, rule_result: dict, ensemble_result: EnsembleResult) -> dict:
+        """Merge an ensemble prediction into the rule-based result."""
         # Combine results
         enhanced_result = {
             **rule_result,
             'ensemble': {
-                'confidence': ensemble_result['ensemble_confidence'],
-                'rule_confidence': ensemble_result['rule_confidence'],
-                'classification': self._classify(ensemble_result['ensemble_confidence']),
+                'confidence': ensemble_result.ensemble_confidence,
+                'rule_confidence': ensemble_result.rule_confidence,
+                'classification': self._classify(ensemble_result.ensemble_confidence),
             }
         }
         
         # Add ML-specific results if available
-        if 'ml_score' in ensemble_result:
+        if ensemble_result.ml_available:
             enhanced_result['ensemble'].update({
-                'ml_score': ensemble_result['ml_score'],
-                'ml_confidence': ensemble_result['ml_confidence'],
-                'weights': ensemble_result['weights'],
-                'disagreement': ensemble_result['disagreement'],
-                'requires_review': ensemble_result['requires_review'],
+                'ml_score': ensemble_result.ml_score,
+                'ml_confidence': ensemble_result.ml_confidence,
+                'weights': ensemble_result.weights,
+                'disagreement': ensemble_result.disagreement,
+                'requires_review': ensemble_result.requires_review,
             })
         
         return enhanced_result
@@ -153,7 +190,7 @@ def demo_ml():
     print("=" * 60)
     
     # Check if model exists
-    model_path = "models/codebase_csi_best.pt"
+    model_path = "models/codebase_csi_best.safetensors"
     if not Path(model_path).exists():
         print(f"\n⚠️  Model not found at {model_path}")
         print("To use ML detection:")
@@ -266,7 +303,7 @@ def process(data):
     rule_detector = EnhancedDetector(use_ml=False)
     
     # ML detector (if available)
-    model_path = "models/codebase_csi_best.pt"
+    model_path = "models/codebase_csi_best.safetensors"
     ml_detector = None
     if Path(model_path).exists():
         ml_detector = EnhancedDetector(ml_model_path=model_path, use_ml=True)
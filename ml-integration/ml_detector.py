@@ -3,24 +3,87 @@ Machine Learning Detector for Codebase CSI v2.0
 Integrates CodeBERT-based model with rule-based analyzers
 """
 
-from typing import Dict, Optional, Tuple
+import hashlib
+import sys
+from collections import OrderedDict
+from dataclasses import dataclass
+from operator import mul
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 import torch
 import torch.nn as nn
-from transformers import RobertaTokenizer, RobertaModel
+from transformers import AutoModel, RobertaTokenizerFast
+from transformers import __version__ as transformers_version
 import numpy as np
+from safetensors import SafetensorError, safe_open
+from safetensors.torch import load_file as load_safetensors
+from safetensors.torch import save_file as save_safetensors
+
+# ONNX Runtime is optional (see requirements-ml.txt); fall back to PyTorch eager
+try:
+    import onnxruntime as ort
+    ONNX_AVAILABLE = True
+except ImportError:
+    ort = None
+    ONNX_AVAILABLE = False
+
+ONNX_INPUT_NAMES = ['input_ids', 'attention_mask', 'rule_scores', 'metadata']
+ONNX_OUTPUT_NAMES = ['prediction', 'confidence']
+
+# Encoders: the full 12-layer CodeBERT teacher and the 6-layer distilled
+# student served by default. Both share the RoBERTa BPE vocabulary, so the
+# CodeBERT tokenizer feeds either one.
+TEACHER_ENCODER = 'microsoft/codebert-base'
+STUDENT_ENCODER = 'distilroberta-base'
+
+# Order of rule-based analyzer scores in the model's rule feature vector
+RULE_SCORE_KEYS = ('pattern', 'statistical', 'security', 'emoji', 'semantic', 'architectural')
+
+# Ensemble weight of each rule-based analyzer, in RULE_SCORE_KEYS order
+RULE_SCORE_WEIGHTS = (0.25, 0.20, 0.20, 0.15, 0.10, 0.05)
+
+
+def cpu_supports_vnni() -> bool:
+    """
+    Check whether the CPU exposes VNNI int8 dot-product instructions.
+    
+    Static INT8 only pays off when oneDNN can use VPDPBUSD; on older x86
+    parts it is often slower than FP32, so callers fall back to dynamic
+    quantization when this returns False.
+    """
+    try:
+        with open('/proc/cpuinfo') as f:
+            cpuinfo = f.read()
+    except OSError:
+        return False
+    return 'avx512_vnni' in cpuinfo or 'avx_vnni' in cpuinfo
 
 
 class CodebaseCSIModel(nn.Module):
     """
     Deep learning model for AI code detection.
-    Uses CodeBERT embeddings + custom classification head.
+    Uses transformer [CLS] embeddings + custom classification head.
+    
+    The encoder defaults to the 6-layer distilled student; pass
+    encoder_name=TEACHER_ENCODER for the full CodeBERT model.
     """
     
-    def __init__(self, num_rule_features: int = 6):
+    def __init__(
+        self,
+        num_rule_features: int = 6,
+        attn_implementation: str = 'sdpa',
+        encoder_name: str = STUDENT_ENCODER
+    ):
         super().__init__()
-        
-        # Load pre-trained CodeBERT
-        self.codebert = RobertaModel.from_pretrained('microsoft/codebert-base')
+        self.encoder_name = encoder_name
+        
+        # Load pre-trained encoder (kept as `codebert` so checkpoints stay
+        # compatible); SDPA avoids materializing the full [B, H, L, L]
+        # attention matrix (FlashAttention kernels on CUDA)
+        self.codebert = AutoModel.from_pretrained(
+            encoder_name,
+            attn_implementation=attn_implementation
+        )
         
         # Feature dimensions
         self.codebert_dim = 768
@@ -28,9 +91,13 @@ class CodebaseCSIModel(nn.Module):
         self.metadata_dim = 10
         self.total_dim = self.codebert_dim + self.rule_dim + self.metadata_dim
         
-        # Custom classification head
+        # Custom classification head. The first layer is split per input so
+        # the features are never concatenated into a [batch, 784] buffer:
+        # fc_cls(cls) + fc_rule(rules) + fc_meta(meta) == Linear(784)(cat)
+        self.fc_cls = nn.Linear(self.codebert_dim, 512)
+        self.fc_rule = nn.Linear(self.rule_dim, 512, bias=False)
+        self.fc_meta = nn.Linear(self.metadata_dim, 512, bias=False)
         self.classifier = nn.Sequential(
-            nn.Linear(self.total_dim, 512),
             nn.LayerNorm(512),
             nn.ReLU(),
             nn.Dropout(0.3),
@@ -48,15 +115,6 @@ class CodebaseCSIModel(nn.Module):
             nn.Linear(128, 1),
             nn.Sigmoid()  # Output: 0.0 (human) to 1.0 (AI)
         )
-        
-        # Confidence estimator (parallel head)
-        self.confidence_estimator = nn.Sequential(
-            nn.Linear(self.total_dim, 256),
-            nn.ReLU(),
-            nn.Dropout(0.2),
-            nn.Linear(256, 1),
-            nn.Sigmoid()  # Output: 0.0 (uncertain) to 1.0 (confident)
-        )
     
     def forward(
         self,
@@ -71,31 +129,222 @@ class CodebaseCSIModel(nn.Module):
         Returns:
             (prediction, confidence) tuple
         """
-        # Get CodeBERT embeddings
+        cls_embedding = self.encode(input_ids, attention_mask)
+        return self.classify(cls_embedding, rule_scores, metadata)
+    
+    def encode(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        """
+        Run the encoder and return the [CLS] embedding, shape [batch, 768].
+        """
         outputs = self.codebert(
             input_ids=input_ids,
             attention_mask=attention_mask
         )
         
         # Use [CLS] token embedding
-        cls_embedding = outputs.last_hidden_state[:, 0, :]  # [batch, 768]
+        return outputs.last_hidden_state[:, 0, :]
+    
+    def classify(
+        self,
+        cls_embedding: torch.Tensor,
+        rule_scores: torch.Tensor,
+        metadata: torch.Tensor
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Run the classification head on encoded features.
         
-        # Concatenate all features
-        combined_features = torch.cat([
-            cls_embedding,
-            rule_scores,
-            metadata
-        ], dim=1)  # [batch, 784]
+        Returns:
+            (prediction, confidence) tuple
+        """
+        # First layer over all features, without concatenating them
+        hidden = (
+            self.fc_cls(cls_embedding) +
+            self.fc_rule(rule_scores) +
+            self.fc_meta(metadata)
+        )  # [batch, 512]
         
         # Predict AI confidence
-        prediction = self.classifier(combined_features)
+        prediction = self.classifier(hidden)
         
-        # Estimate model confidence
-        confidence = self.confidence_estimator(combined_features)
+        # Model confidence from the prediction itself: 0 at p=0.5, 1 at p=0/1
+        confidence = 1.0 - 4.0 * prediction * (1.0 - prediction)
         
         return prediction, confidence
 
 
+def split_legacy_head(state_dict: Dict[str, torch.Tensor]) -> Dict[str, torch.Tensor]:
+    """
+    Convert a checkpoint with a single Linear(784, 512) as classifier.0 to
+    the split fc_cls / fc_rule / fc_meta layout. Other checkpoints are
+    returned unchanged.
+    """
+    if 'classifier.0.weight' not in state_dict or 'fc_cls.weight' in state_dict:
+        return state_dict
+    
+    converted = {}
+    for name, tensor in state_dict.items():
+        if not name.startswith('classifier.'):
+            converted[name] = tensor
+            continue
+        _, index, param = name.split('.', 2)
+        if index != '0':
+            converted[f'classifier.{int(index) - 1}.{param}'] = tensor
+    
+    weight = state_dict['classifier.0.weight']
+    cls_weight, rule_weight, meta_weight = weight.split([768, weight.shape[1] - 778, 10], dim=1)
+    converted['fc_cls.weight'] = cls_weight
+    converted['fc_cls.bias'] = state_dict['classifier.0.bias']
+    converted['fc_rule.weight'] = rule_weight
+    converted['fc_meta.weight'] = meta_weight
+    return converted
+
+
+def load_weights(model_path: str, device: torch.device) -> Dict[str, torch.Tensor]:
+    """
+    Load a state dict from .safetensors (memory-mapped) or a legacy .pt file.
+    
+    Older checkpoints still carry the removed confidence_estimator head;
+    those keys are dropped so the rest can be loaded strictly.
+    """
+    if str(model_path).endswith('.safetensors'):
+        state_dict = load_safetensors(str(model_path), device=str(device))
+    else:
+        state_dict = torch.load(model_path, map_location=device)
+    state_dict = {
+        name: tensor for name, tensor in state_dict.items()
+        if not name.startswith('confidence_estimator.')
+    }
+    return split_legacy_head(state_dict)
+
+
+def load_checkpoint(model: CodebaseCSIModel, model_path: str, device: torch.device):
+    """
+    Load checkpoint weights into model strictly.
+    
+    A checkpoint trained with a different encoder (e.g. 12-layer CodeBERT
+    weights into the 6-layer student) raises instead of silently dropping
+    the layers that do not fit.
+    """
+    try:
+        model.load_state_dict(load_weights(model_path, device))
+    except RuntimeError as error:
+        raise RuntimeError(
+            f"Checkpoint {model_path} does not match the '{model.encoder_name}' "
+            f"encoder. Weights trained with full CodeBERT need "
+            f"encoder_name=TEACHER_ENCODER ('{TEACHER_ENCODER}')."
+        ) from error
+
+
+def weights_digest(model_path: str, encoder_name: str) -> str:
+    """Short hex digest of a weights file together with its encoder name."""
+    digest = hashlib.blake2b(encoder_name.encode('utf-8'), digest_size=8)
+    with open(model_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FeatureCache:
+    """
+    LRU cache of tokenized inputs and metadata keyed by content hash.
+    
+    Re-scans mostly see unchanged files, so a hit skips tokenization and
+    metadata extraction entirely. Entries can be persisted to disk so CI
+    runs benefit across invocations; a version mismatch (different
+    tokenizer or transformers release) discards the persisted entries.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        cache_path: Optional[str] = None,
+        version: str = ''
+    ):
+        self.max_entries = max_entries
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.version = version
+        self._entries: OrderedDict = OrderedDict()
+        
+        if self.cache_path and self.cache_path.exists():
+            self.load()
+    
+    @staticmethod
+    def key(code: str, file_path: str) -> Tuple[bytes, bool]:
+        """Cache key: content digest plus the file-type bit used in metadata."""
+        digest = hashlib.blake2b(
+            code.encode('utf-8', 'surrogatepass'), digest_size=16
+        ).digest()
+        return digest, file_path.endswith('.py')
+    
+    def get(self, key: Tuple[bytes, bool]) -> Optional[Tuple[torch.Tensor, ...]]:
+        """Return cached (input_ids, attention_mask, metadata) or None."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+    
+    def put(self, key: Tuple[bytes, bool], entry: Tuple[torch.Tensor, ...]):
+        """Store an entry, evicting the least recently used beyond max_entries."""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def load(self):
+        """
+        Load persisted entries if they were written by the same version.
+        
+        The file is safetensors (plain tensors, no pickle), so a cache
+        restored from an untrusted CI cache cannot execute code.
+        """
+        try:
+            with safe_open(str(self.cache_path), framework='pt') as f:
+                if (f.metadata() or {}).get('version') != self.version:
+                    return
+                keys = f.get_tensor('keys')
+                input_ids = f.get_tensor('input_ids')
+                attention_mask = f.get_tensor('attention_mask')
+                metadata = f.get_tensor('metadata')
+        except (OSError, SafetensorError):
+            return
+        
+        # Rows are stored least recently used first; keep the newest
+        entries = OrderedDict()
+        for row in range(max(0, len(keys) - self.max_entries), len(keys)):
+            key_bytes = bytes(keys[row].tolist())
+            entries[key_bytes[:-1], bool(key_bytes[-1])] = (
+                input_ids[row], attention_mask[row], metadata[row]
+            )
+        self._entries = entries
+    
+    def save(self):
+        """Persist entries to cache_path as safetensors (no-op without a path)."""
+        if self.cache_path is None or not self._entries:
+            return
+        
+        # One row per entry: 16 digest bytes plus the is-Python flag
+        keys = torch.tensor(
+            [list(digest) + [is_python] for digest, is_python in self._entries],
+            dtype=torch.uint8
+        )
+        entries = list(self._entries.values())
+        
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        save_safetensors(
+            {
+                'keys': keys,
+                'input_ids': torch.stack([entry[0] for entry in entries]),
+                'attention_mask': torch.stack([entry[1] for entry in entries]),
+                'metadata': torch.stack([entry[2] for entry in entries]),
+            },
+            str(self.cache_path),
+            metadata={'version': self.version},
+        )
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
 class MLDetector:
     """
     Machine learning detector that integrates with rule-based analyzers.
@@ -105,35 +354,182 @@ class MLDetector:
         self,
         model_path: Optional[str] = None,
         device: str = 'cpu',
-        use_quantization: bool = True
+        use_quantization: bool = True,
+        use_onnx: bool = False,
+        onnx_path: Optional[str] = None,
+        calibration_samples: Optional[List[Dict]] = None,
+        encoder_name: str = STUDENT_ENCODER,
+        cache_size: int = 10000,
+        cache_path: Optional[str] = None,
+        use_compile: bool = False
     ):
         """
         Initialize ML detector.
         
         Args:
-            model_path: Path to trained model weights
+            model_path: Path to trained model weights (.safetensors or legacy .pt)
             device: 'cpu' or 'cuda'
             use_quantization: Use quantized model for faster inference
+            use_onnx: Serve CPU inference through ONNX Runtime (requires onnxruntime)
+            onnx_path: Base path of the exported ONNX graph (defaults to the
+                model path with a .onnx suffix); the file name is keyed on a
+                digest of the weights and encoder, so retrained weights are
+                re-exported instead of serving a stale graph
+            calibration_samples: Representative samples ({'code', 'file_path',
+                'rule_scores'}) used to calibrate static INT8 quantization;
+                ~100 is enough. Without them dynamic quantization is used.
+            encoder_name: Encoder the weights were trained with (the distilled
+                student by default; TEACHER_ENCODER for full CodeBERT weights)
+            cache_size: Max files kept in the tokenization cache (0 disables it)
+            cache_path: Persist the tokenization cache here between runs
+                (written by save_cache())
+            use_compile: Compile the eval-mode model with torch.compile to
+                fuse the small head ops (first call per batch shape compiles)
         """
+        if use_onnx and not model_path:
+            raise ValueError("use_onnx requires model_path: an untrained model is never exported")
+        
         self.device = torch.device(device)
-        self.tokenizer = RobertaTokenizer.from_pretrained('microsoft/codebert-base')
+        self.tokenizer = RobertaTokenizerFast.from_pretrained('microsoft/codebert-base')
+        
+        # Tokenization/metadata cache keyed by content hash
+        self.feature_cache = None
+        if cache_size > 0:
+            self.feature_cache = FeatureCache(
+                max_entries=cache_size,
+                cache_path=cache_path,
+                version=f"{self.tokenizer.name_or_path}:{transformers_version}"
+            )
+        
+        # Reusable (pinned on CUDA) staging buffers for rule scores and
+        # metadata; grown on demand by _staging_buffers()
+        self._rule_buf = torch.empty(0, len(RULE_SCORE_KEYS), dtype=torch.float32)
+        self._meta_buf = torch.empty(0, 10, dtype=torch.float32)
         
         # Load model
-        self.model = CodebaseCSIModel()
+        self.model = CodebaseCSIModel(encoder_name=encoder_name)
         
         if model_path:
-            self.model.load_state_dict(torch.load(model_path, map_location=self.device))
+            load_checkpoint(self.model, model_path, self.device)
         
         self.model.to(self.device)
         self.model.eval()
         
+        # ONNX Runtime session (CPU only); replaces eager PyTorch in predict()
+        self.ort_session = None
+        if use_onnx and device == 'cpu' and ONNX_AVAILABLE:
+            if onnx_path is None:
+                onnx_path = str(Path(model_path).with_suffix('.onnx'))
+            self.ort_session = self._build_ort_session(
+                Path(onnx_path), weights_digest(model_path, encoder_name)
+            )
+        
         # Quantize for faster inference
-        if use_quantization and device == 'cpu':
-            self.model = torch.quantization.quantize_dynamic(
+        if use_quantization and device == 'cpu' and self.ort_session is None:
+            if calibration_samples and self._static_quantization_supported():
+                self._quantize_static(calibration_samples)
+            else:
+                self.model = torch.quantization.quantize_dynamic(
+                    self.model,
+                    {nn.Linear},
+                    dtype=torch.qint8
+                )
+        
+        # Compile after eval() and quantization so dropout is folded away
+        if use_compile and self.ort_session is None:
+            self.model.compile(mode='reduce-overhead', fullgraph=False, dynamic=False)
+    
+    def save_cache(self):
+        """Persist the tokenization cache to cache_path (no-op without one)."""
+        if self.feature_cache is not None:
+            self.feature_cache.save()
+    
+    @staticmethod
+    def _static_quantization_supported() -> bool:
+        """Static INT8 needs the oneDNN engine and a VNNI-capable CPU."""
+        if 'onednn' not in torch.backends.quantized.supported_engines:
+            return False
+        return cpu_supports_vnni()
+    
+    def _quantize_static(self, calibration_samples: List[Dict]):
+        """
+        Statically quantize the classification head to INT8 (QDQ via FX).
+        
+        Observers are inserted into the split input layers (fc_cls, fc_rule,
+        fc_meta) and the classifier behind them, calibrated on the given
+        samples, then converted so activations stay INT8 between GEMMs.
+        The CodeBERT encoder is not FX-traceable, so it keeps dynamic
+        quantization of its Linear layers.
+        """
+        from torch.ao.quantization import get_default_qconfig_mapping
+        from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+        
+        torch.backends.quantized.engine = 'onednn'
+        qconfig_mapping = get_default_qconfig_mapping('onednn')
+        head_input_dims = {
+            'fc_cls': self.model.codebert_dim,
+            'fc_rule': self.model.rule_dim,
+            'fc_meta': self.model.metadata_dim,
+            'classifier': 512,
+        }
+        
+        for name, input_dim in head_input_dims.items():
+            example_inputs = (torch.zeros(1, input_dim),)
+            setattr(self.model, name, prepare_fx(
+                getattr(self.model, name), qconfig_mapping, example_inputs
+            ))
+        
+        # Calibration pass: collect activation ranges
+        with torch.inference_mode():
+            for sample in calibration_samples:
+                self.model(*self._prepare_inputs([sample]))
+        
+        for name in head_input_dims:
+            setattr(self.model, name, convert_fx(getattr(self.model, name)))
+        self.model.codebert = torch.quantization.quantize_dynamic(
+            self.model.codebert,
+            {nn.Linear},
+            dtype=torch.qint8
+        )
+    
+    def _build_ort_session(self, onnx_path: Path, digest: str) -> 'ort.InferenceSession':
+        """
+        Export the model to ONNX (if needed) and open an ONNX Runtime session.
+        
+        Exported files are named after the weights digest, so a graph is only
+        reused for the exact weights and encoder it was exported from.
+        The exported graph is run through the ONNX Runtime BERT optimizer so
+        attention, LayerNorm and GELU are fused for CPU inference.
+        """
+        onnx_path = onnx_path.with_name(f'{onnx_path.stem}.{digest}.onnx')
+        optimized_path = onnx_path.with_name(f'{onnx_path.stem}_optimized.onnx')
+        
+        if not optimized_path.exists():
+            dummy_ids = torch.ones(1, 512, dtype=torch.long)
+            dummy_mask = torch.ones(1, 512, dtype=torch.long)
+            dummy_rules = torch.zeros(1, 6, dtype=torch.float32)
+            dummy_meta = torch.zeros(1, 10, dtype=torch.float32)
+            
+            torch.onnx.export(
                 self.model,
-                {nn.Linear},
-                dtype=torch.qint8
+                (dummy_ids, dummy_mask, dummy_rules, dummy_meta),
+                str(onnx_path),
+                input_names=ONNX_INPUT_NAMES,
+                output_names=ONNX_OUTPUT_NAMES,
+                opset_version=17,
+                dynamic_axes={name: {0: 'batch'} for name in ONNX_INPUT_NAMES + ONNX_OUTPUT_NAMES},
             )
+            
+            from onnxruntime.transformers.optimizer import optimize_model
+            optimized = optimize_model(
+                str(onnx_path),
+                model_type='bert',
+                num_heads=12,
+                hidden_size=768
+            )
+            optimized.save_model_to_file(str(optimized_path))
+        
+        return ort.InferenceSession(str(optimized_path), providers=['CPUExecutionProvider'])
     
     def extract_metadata(self, code: str, file_path: str) -> torch.Tensor:
         """
@@ -142,26 +538,36 @@ class MLDetector:
         Returns:
             Tensor of shape [10] with metadata features
         """
-        lines = code.split('\n')
+        # One vectorized sweep for line lengths; UTF-32 keeps one element
+        # per character so lengths match len(line) exactly
+        chars = np.frombuffer(code.encode('utf-32-le'), dtype=np.uint32)
+        line_ends = np.flatnonzero(chars == 0x0A)
+        line_lengths = np.diff(np.concatenate(([-1], line_ends, [len(chars)]))) - 1
+        num_lines = len(line_lengths)
+        
+        tokens = code.split()
+        num_tokens = len(tokens)
         
         features = [
             len(code),                          # File size in chars
-            len(lines),                         # Number of lines
-            len(code.split()),                  # Number of tokens
+            num_lines,                          # Number of lines
+            num_tokens,                         # Number of tokens
             code.count('\n\n'),                 # Blank line count
             code.count('#'),                    # Comment count
-            max(len(line) for line in lines),   # Max line length
-            sum(len(line) for line in lines) / max(len(lines), 1),  # Avg line length
+            line_lengths.max(),                 # Max line length
+            (len(code) - len(line_ends)) / num_lines,   # Avg line length
             code.count('def ') + code.count('class '),  # Function/class count
             1 if file_path.endswith('.py') else 0,      # Is Python
-            len(set(code.split())) / max(len(code.split()), 1),  # Unique token ratio
+            len(set(tokens)) / max(num_tokens, 1),      # Unique token ratio
         ]
         
-        # Normalize features
+        # Normalize features in place (std is shift-invariant)
         features = np.array(features, dtype=np.float32)
-        features = (features - features.mean()) / (features.std() + 1e-8)
+        features -= features.mean()
+        features /= features.std() + 1e-8
         
-        return torch.tensor(features, dtype=torch.float32)
+        # Share the float32 buffer instead of copying it into a new tensor
+        return torch.from_numpy(features)
     
     def predict(
         self,
@@ -180,45 +586,147 @@ class MLDetector:
         Returns:
             Dictionary with prediction results
         """
-        # Tokenize code
-        encoding = self.tokenizer(
-            code,
-            max_length=512,
-            padding='max_length',
-            truncation=True,
-            return_tensors='pt'
-        )
+        return self.predict_batch([{
+            'code': code,
+            'file_path': file_path,
+            'rule_scores': rule_scores,
+        }])[0]
+    
+    def predict_batch(self, samples: List[Dict]) -> List[Dict[str, float]]:
+        """
+        Predict AI confidence for several files in one forward pass.
         
-        input_ids = encoding['input_ids'].to(self.device)
-        attention_mask = encoding['attention_mask'].to(self.device)
-        
-        # Prepare rule scores tensor
-        rule_score_values = [
-            rule_scores.get('pattern', 0.0),
-            rule_scores.get('statistical', 0.0),
-            rule_scores.get('security', 0.0),
-            rule_scores.get('emoji', 0.0),
-            rule_scores.get('semantic', 0.0),
-            rule_scores.get('architectural', 0.0),
-        ]
-        rule_tensor = torch.tensor([rule_score_values], dtype=torch.float32).to(self.device)
+        Batching amortizes streaming the CodeBERT weights, which dominates
+        CPU inference at batch size 1.
         
-        # Extract metadata
-        metadata = self.extract_metadata(code, file_path).unsqueeze(0).to(self.device)
+        Args:
+            samples: Dicts with 'code', 'file_path' and 'rule_scores' keys
+        
+        Returns:
+            One prediction dictionary per sample, in input order
+        """
+        if not samples:
+            return []
+        
+        input_ids, attention_mask, rule_tensor, metadata = self._prepare_inputs(samples)
         
         # Inference
-        with torch.no_grad():
-            prediction, confidence = self.model(
-                input_ids,
-                attention_mask,
-                rule_tensor,
-                metadata
+        if self.ort_session is not None:
+            prediction, confidence = self.ort_session.run(None, {
+                'input_ids': input_ids.numpy(),
+                'attention_mask': attention_mask.numpy(),
+                'rule_scores': rule_tensor.numpy(),
+                'metadata': metadata.numpy(),
+            })
+        else:
+            with torch.inference_mode():
+                prediction, confidence = self.model(
+                    input_ids,
+                    attention_mask,
+                    rule_tensor,
+                    metadata
+                )
+        
+        return [
+            {'ml_score': score, 'ml_confidence': conf}
+            for score, conf in zip(prediction[:, 0].tolist(), confidence[:, 0].tolist())
+        ]
+    
+    def _prepare_inputs(
+        self,
+        samples: List[Dict]
+    ) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor]:
+        """
+        Build the four batched model inputs.
+        
+        Tokenized inputs and metadata come from the feature cache when the
+        file content was seen before.
+        
+        Returns:
+            (input_ids, attention_mask, rule_tensor, metadata) on self.device,
+            shaped [B, 512], [B, 512], [B, 6] and [B, 10]
+        """
+        # Probe the cache; only misses are tokenized (in one call)
+        if self.feature_cache is not None:
+            keys = [
+                FeatureCache.key(sample['code'], sample.get('file_path', ''))
+                for sample in samples
+            ]
+            entries = [self.feature_cache.get(key) for key in keys]
+        else:
+            keys = None
+            entries = [None] * len(samples)
+        
+        missing = [i for i, entry in enumerate(entries) if entry is None]
+        if missing:
+            encoding = self.tokenizer(
+                [samples[i]['code'] for i in missing],
+                max_length=512,
+                padding='max_length',
+                truncation=True,
+                return_tensors='pt'
             )
+            
+            for row, i in enumerate(missing):
+                entry = (
+                    encoding['input_ids'][row].clone(),
+                    encoding['attention_mask'][row].clone(),
+                    self.extract_metadata(samples[i]['code'], samples[i].get('file_path', '')),
+                )
+                entries[i] = entry
+                if self.feature_cache is not None:
+                    self.feature_cache.put(keys[i], entry)
+        
+        input_ids = torch.stack([entry[0] for entry in entries]).to(self.device)
+        attention_mask = torch.stack([entry[1] for entry in entries]).to(self.device)
+        
+        # Fill the staging buffers in place, then copy (async when pinned)
+        rule_buf, meta_buf = self._staging_buffers(len(samples))
+        rule_values = rule_buf.numpy()
+        for row, sample in enumerate(samples):
+            scores = sample.get('rule_scores', {})
+            rule_values[row] = [scores.get(key, 0.0) for key in RULE_SCORE_KEYS]
+        torch.stack([entry[2] for entry in entries], out=meta_buf)
+        
+        rule_tensor = rule_buf.to(self.device, non_blocking=True)
+        metadata = meta_buf.to(self.device, non_blocking=True)
+        
+        return input_ids, attention_mask, rule_tensor, metadata
+    
+    def _staging_buffers(self, batch_size: int) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Return [batch_size, 6] / [batch_size, 10] views of the staging buffers.
         
-        return {
-            'ml_score': prediction.item(),
-            'ml_confidence': confidence.item(),
-        }
+        Buffers are reallocated (doubling) only when a larger batch arrives,
+        so steady-state calls do no host allocation.
+        """
+        if batch_size > self._rule_buf.shape[0]:
+            capacity = max(batch_size, 2 * self._rule_buf.shape[0])
+            pin = self.device.type == 'cuda'
+            self._rule_buf = torch.empty(
+                capacity, len(RULE_SCORE_KEYS), dtype=torch.float32, pin_memory=pin
+            )
+            self._meta_buf = torch.empty(capacity, 10, dtype=torch.float32, pin_memory=pin)
+        
+        return self._rule_buf[:batch_size], self._meta_buf[:batch_size]
+
+
+# dataclass(slots=True) needs Python 3.10+
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_SLOTS)
+class EnsembleResult:
+    """Result of an ensemble prediction for one file."""
+    rule_confidence: float
+    ensemble_confidence: float
+    rule_scores: Optional[Dict[str, float]] = None
+    ml_score: float = 0.0
+    ml_confidence: float = 0.0
+    weights: Optional[Dict[str, float]] = None
+    disagreement: float = 0.0
+    requires_review: bool = False
+    ml_available: bool = True
 
 
 class EnsembleDetector:
@@ -235,13 +743,17 @@ class EnsembleDetector:
         """
         self.ml_detector = ml_detector
         self.ml_available = ml_detector is not None
+        
+        # Precomputed for the common case where every analyzer reported
+        self._rule_key_set = frozenset(RULE_SCORE_KEYS)
+        self._total_rule_weight = sum(RULE_SCORE_WEIGHTS)
     
     def predict(
         self,
         code: str,
         file_path: str,
         rule_scores: Dict[str, float]
-    ) -> Dict[str, any]:
+    ) -> EnsembleResult:
         """
         Ensemble prediction combining rules and ML.
         
@@ -251,74 +763,111 @@ class EnsembleDetector:
             rule_scores: Dictionary of rule-based analyzer scores
         
         Returns:
-            Dictionary with ensemble results
+            EnsembleResult for the file
         """
-        # Calculate rule-based confidence
-        rule_confidence = self._calculate_rule_confidence(rule_scores)
-        
-        result = {
-            'rule_confidence': rule_confidence,
-            'rule_scores': rule_scores,
-        }
-        
-        # Add ML prediction if available
+        ml_result = None
         if self.ml_available:
             ml_result = self.ml_detector.predict(code, file_path, rule_scores)
-            result.update(ml_result)
-            
-            # Calculate ensemble confidence
-            ml_score = ml_result['ml_score']
-            ml_conf = ml_result['ml_confidence']
+        
+        return self._combine(rule_scores, ml_result)
+    
+    def predict_batch(
+        self,
+        samples: List[Dict],
+        batch_size: int = 16
+    ) -> List[EnsembleResult]:
+        """
+        Ensemble prediction for many files, batching the ML forward pass.
+        
+        Args:
+            samples: Dicts with 'code', 'file_path' and 'rule_scores' keys
+            batch_size: Number of files per ML forward pass
+        
+        Returns:
+            One EnsembleResult per sample, in input order
+        """
+        results = []
+        
+        for start in range(0, len(samples), batch_size):
+            batch = samples[start:start + batch_size]
             
-            # Adaptive weighting based on ML confidence
-            if ml_conf > 0.8:
-                # High ML confidence: trust ML more
-                weights = {'ml': 0.7, 'rules': 0.3}
-            elif ml_conf > 0.5:
-                # Medium ML confidence: balanced
-                weights = {'ml': 0.5, 'rules': 0.5}
+            if self.ml_available:
+                ml_results = self.ml_detector.predict_batch(batch)
             else:
-                # Low ML confidence: trust rules more
-                weights = {'ml': 0.3, 'rules': 0.7}
+                ml_results = [None] * len(batch)
             
-            ensemble_confidence = (
-                weights['ml'] * ml_score +
-                weights['rules'] * rule_confidence
+            for sample, ml_result in zip(batch, ml_results):
+                results.append(self._combine(sample['rule_scores'], ml_result))
+        
+        return results
+    
+    def _combine(
+        self,
+        rule_scores: Dict[str, float],
+        ml_result: Optional[Dict[str, float]]
+    ) -> EnsembleResult:
+        """
+        Combine rule-based scores with an (optional) ML prediction.
+        """
+        # Calculate rule-based confidence
+        rule_confidence = self._calculate_rule_confidence(rule_scores)
+        
+        if ml_result is None:
+            # Fallback to rule-based only
+            return EnsembleResult(
+                rule_confidence=rule_confidence,
+                ensemble_confidence=rule_confidence,
+                rule_scores=rule_scores,
+                ml_available=False,
             )
-            
-            # Check for disagreement
-            disagreement = abs(ml_score - rule_confidence)
-            
-            result.update({
-                'ensemble_confidence': ensemble_confidence,
-                'weights': weights,
-                'disagreement': disagreement,
-                'requires_review': disagreement > 0.3,
-            })
+        
+        # Calculate ensemble confidence
+        ml_score = ml_result['ml_score']
+        ml_conf = ml_result['ml_confidence']
+        
+        # Adaptive weighting based on ML confidence
+        if ml_conf > 0.8:
+            # High ML confidence: trust ML more
+            weights = {'ml': 0.7, 'rules': 0.3}
+        elif ml_conf > 0.5:
+            # Medium ML confidence: balanced
+            weights = {'ml': 0.5, 'rules': 0.5}
         else:
-            # Fallback to rule-based only
-            result['ensemble_confidence'] = rule_confidence
-            result['ml_available'] = False
+            # Low ML confidence: trust rules more
+            weights = {'ml': 0.3, 'rules': 0.7}
+        
+        ensemble_confidence = (
+            weights['ml'] * ml_score +
+            weights['rules'] * rule_confidence
+        )
         
-        return result
+        # Check for disagreement
+        disagreement = abs(ml_score - rule_confidence)
+        
+        return EnsembleResult(
+            rule_confidence=rule_confidence,
+            ensemble_confidence=ensemble_confidence,
+            rule_scores=rule_scores,
+            ml_score=ml_score,
+            ml_confidence=ml_conf,
+            weights=weights,
+            disagreement=disagreement,
+            requires_review=disagreement > 0.3,
+        )
     
     def _calculate_rule_confidence(self, rule_scores: Dict[str, float]) -> float:
         """
         Calculate weighted average of rule-based scores.
         """
-        weights = {
-            'pattern': 0.25,
-            'statistical': 0.20,
-            'security': 0.20,
-            'emoji': 0.15,
-            'semantic': 0.10,
-            'architectural': 0.05,
-        }
+        # Fast path: all analyzers present -> one fused multiply-add
+        if rule_scores.keys() >= self._rule_key_set:
+            total = sum(map(mul, map(rule_scores.__getitem__, RULE_SCORE_KEYS), RULE_SCORE_WEIGHTS))
+            return total / self._total_rule_weight
         
         total = 0.0
         total_weight = 0.0
         
-        for analyzer, weight in weights.items():
+        for analyzer, weight in zip(RULE_SCORE_KEYS, RULE_SCORE_WEIGHTS):
             if analyzer in rule_scores:
                 total += rule_scores[analyzer] * weight
                 total_weight += weight
@@ -351,8 +900,8 @@ def calculate_sum(numbers):
     }
     
     result = ensemble.predict(code, "example.py", rule_scores)
-    print(f"Rule Confidence: {result['rule_confidence']:.2f}")
-    print(f"Ensemble Confidence: {result['ensemble_confidence']:.2f}")
+    print(f"Rule Confidence: {result.rule_confidence:.2f}")
+    print(f"Ensemble Confidence: {result.ensemble_confidence:.2f}")
     
     # Example: With ML (v2.0)
     print("\n" + "=" * 60)
@@ -365,7 +914,7 @@ def calculate_sum(numbers):
     # Uncomment when model is trained:
     
     ml_detector = MLDetector(
-        model_path='models/codebase_csi_v2.pt',
+        model_path='models/codebase_csi_best.safetensors',
         device='cpu',
         use_quantization=True
     )
@@ -373,11 +922,11 @@ def calculate_sum(numbers):
     ensemble = EnsembleDetector(ml_detector)
     result = ensemble.predict(code, "example.py", rule_scores)
     
-    print(f"Rule Confidence: {result['rule_confidence']:.2f}")
-    print(f"ML Score: {result['ml_score']:.2f}")
-    print(f"ML Confidence: {result['ml_confidence']:.2f}")
-    print(f"Ensemble Confidence: {result['ensemble_confidence']:.2f}")
-    print(f"Weights: {result['weights']}")
-    if result['requires_review']:
+    print(f"Rule Confidence: {result.rule_confidence:.2f}")
+    print(f"ML Score: {result.ml_score:.2f}")
+    print(f"ML Confidence: {result.ml_confidence:.2f}")
+    print(f"Ensemble Confidence: {result.ensemble_confidence:.2f}")
+    print(f"Weights: {result.weights}")
+    if result.requires_review:
         print("⚠️  DISAGREEMENT DETECTED - Manual review recommended")
     """
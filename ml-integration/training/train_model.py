@@ -6,23 +6,30 @@ Fine-tunes CodeBERT for AI code detection
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from torch.utils.data import Dataset, DataLoader, random_split
-from transformers import RobertaTokenizer, get_linear_schedule_with_warmup
+from torch.nn.utils.rnn import pad_sequence
+from torch.utils.data import Dataset, DataLoader, Sampler, Subset, random_split
+from transformers import RobertaTokenizerFast, get_linear_schedule_with_warmup
 from pathlib import Path
+import bisect
+import hashlib
 import json
-from typing import List, Dict, Tuple
+import math
+import os
+from typing import List, Dict, Optional, Tuple
 from tqdm import tqdm
 import numpy as np
+from safetensors import SafetensorError, safe_open
+from safetensors.torch import save_file as save_safetensors
 from sklearn.metrics import accuracy_score, precision_recall_fscore_support, roc_auc_score
 import sys
 sys.path.append('..')
-from ml_detector import CodebaseCSIModel
+from ml_detector import CodebaseCSIModel, RULE_SCORE_KEYS, TEACHER_ENCODER, load_checkpoint
 
 
 class CodeDataset(Dataset):
     """Dataset for code samples with labels."""
     
-    def __init__(self, data_dir: Path, tokenizer: RobertaTokenizer, max_length: int = 512):
+    def __init__(self, data_dir: Path, tokenizer: RobertaTokenizerFast, max_length: int = 512):
         """
         Initialize dataset.
         
@@ -42,48 +49,214 @@ class CodeDataset(Dataset):
                 self.samples.extend(data)
         
         print(f"Loaded {len(self.samples)} samples from {data_dir}")
-    
-    def __len__(self) -> int:
-        return len(self.samples)
-    
-    def __getitem__(self, idx: int) -> Dict[str, torch.Tensor]:
-        sample = self.samples[idx]
         
-        # Tokenize code
+        # Encode every sample once, unpadded; batches are padded to their
+        # longest member by PadCollator
         encoding = self.tokenizer(
-            sample['code'],
+            [sample['code'] for sample in self.samples],
             max_length=self.max_length,
-            padding='max_length',
-            truncation=True,
-            return_tensors='pt'
+            padding=False,
+            truncation=True
         )
+        self.input_ids = [torch.tensor(ids, dtype=torch.long) for ids in encoding['input_ids']]
+        self.attention_mask = [
+            torch.tensor(mask, dtype=torch.long) for mask in encoding['attention_mask']
+        ]
+        self.lengths = [len(ids) for ids in encoding['input_ids']]
+        
+        # Rule-based scores (if available), [N, 6]
+        self.rule_scores = torch.tensor([
+            [sample.get('rule_scores', {}).get(key, 0.0) for key in RULE_SCORE_KEYS]
+            for sample in self.samples
+        ], dtype=torch.float32).reshape(-1, len(RULE_SCORE_KEYS))
+        
+        # Metadata, [N, 10]
+        self.metadata = torch.tensor([
+            sample.get('metadata', [0.0] * 10) for sample in self.samples
+        ], dtype=torch.float32).reshape(-1, 10)
         
-        # Get rule-based scores (if available)
-        rule_scores = sample.get('rule_scores', {})
-        rule_tensor = torch.tensor([
-            rule_scores.get('pattern', 0.0),
-            rule_scores.get('statistical', 0.0),
-            rule_scores.get('security', 0.0),
-            rule_scores.get('emoji', 0.0),
-            rule_scores.get('semantic', 0.0),
-            rule_scores.get('architectural', 0.0),
-        ], dtype=torch.float32)
+        # Labels (0.0 = human, 1.0 = AI), [N, 1]
+        self.labels = torch.tensor([
+            [sample['label']] for sample in self.samples
+        ], dtype=torch.float32).reshape(-1, 1)
+    
+    def __len__(self) -> int:
+        return len(self.samples)
+    
+    def __getitem__(self, idx: int) -> Dict[str, torch.Tensor]:
+        return {
+            'input_ids': self.input_ids[idx],
+            'attention_mask': self.attention_mask[idx],
+            'rule_scores': self.rule_scores[idx],
+            'metadata': self.metadata[idx],
+            'label': self.labels[idx],
+        }
+
+
+class CachedEmbeddingDataset(Dataset):
+    """
+    Precomputed [CLS] embeddings paired with the remaining model inputs.
+    
+    While the encoder is frozen (Phase 1) its output never changes, so the
+    head can train on these without re-running the encoder every batch.
+    """
+    
+    def __init__(self, embeddings: torch.Tensor, dataset: CodeDataset):
+        """
+        Args:
+            embeddings: [N, 768] embeddings aligned with dataset indices
+            dataset: Dataset the embeddings were computed from
+        """
+        self.embeddings = embeddings
+        self.dataset = dataset
+    
+    def __len__(self) -> int:
+        return len(self.embeddings)
+    
+    def __getitem__(self, idx: int) -> Dict[str, torch.Tensor]:
+        return {
+            'cls_embedding': self.embeddings[idx],
+            'rule_scores': self.dataset.rule_scores[idx],
+            'metadata': self.dataset.metadata[idx],
+            'label': self.dataset.labels[idx],
+        }
+
+
+class BucketBatchSampler(Sampler):
+    """
+    Yield batches of indices drawn from the same sequence-length bucket.
+    
+    Combined with PadCollator, each batch is padded only to its longest
+    sample, so short snippets no longer pay attention cost for 512 tokens.
+    """
+    
+    def __init__(
+        self,
+        lengths: List[int],
+        batch_size: int,
+        bucket_bounds: Tuple[int, ...] = (128, 256, 512),
+        shuffle: bool = True
+    ):
+        """
+        Args:
+            lengths: Token length of each sample in the wrapped dataset
+            batch_size: Samples per batch
+            bucket_bounds: Inclusive upper length of each bucket
+            shuffle: Shuffle within buckets and the order of batches
+        """
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.buckets: List[List[int]] = [[] for _ in bucket_bounds]
         
-        # Get metadata
-        metadata = torch.tensor(sample.get('metadata', [0.0] * 10), dtype=torch.float32)
+        for idx, length in enumerate(lengths):
+            bucket = min(bisect.bisect_left(bucket_bounds, length), len(bucket_bounds) - 1)
+            self.buckets[bucket].append(idx)
+    
+    def __iter__(self):
+        batches = []
+        for bucket in self.buckets:
+            if self.shuffle:
+                bucket = [bucket[i] for i in torch.randperm(len(bucket)).tolist()]
+            batches.extend(
+                bucket[start:start + self.batch_size]
+                for start in range(0, len(bucket), self.batch_size)
+            )
         
-        # Get label (0.0 = human, 1.0 = AI)
-        label = torch.tensor([sample['label']], dtype=torch.float32)
+        if self.shuffle:
+            batches = [batches[i] for i in torch.randperm(len(batches)).tolist()]
         
+        return iter(batches)
+    
+    def __len__(self) -> int:
+        return sum(math.ceil(len(bucket) / self.batch_size) for bucket in self.buckets)
+
+
+class PadCollator:
+    """Collate variable-length samples, padding to the longest in the batch."""
+    
+    def __init__(self, pad_token_id: int):
+        self.pad_token_id = pad_token_id
+    
+    def __call__(self, batch: List[Dict[str, torch.Tensor]]) -> Dict[str, torch.Tensor]:
         return {
-            'input_ids': encoding['input_ids'].squeeze(0),
-            'attention_mask': encoding['attention_mask'].squeeze(0),
-            'rule_scores': rule_tensor,
-            'metadata': metadata,
-            'label': label,
+            'input_ids': pad_sequence(
+                [item['input_ids'] for item in batch],
+                batch_first=True,
+                padding_value=self.pad_token_id
+            ),
+            'attention_mask': pad_sequence(
+                [item['attention_mask'] for item in batch],
+                batch_first=True,
+                padding_value=0
+            ),
+            'rule_scores': torch.stack([item['rule_scores'] for item in batch]),
+            'metadata': torch.stack([item['metadata'] for item in batch]),
+            'label': torch.stack([item['label'] for item in batch]),
         }
 
 
+def embeddings_digest(model: CodebaseCSIModel, dataset: CodeDataset) -> str:
+    """Hex digest of the encoder weights and the tokenized dataset."""
+    digest = hashlib.blake2b(digest_size=16)
+    for name, tensor in model.codebert.state_dict().items():
+        digest.update(name.encode('utf-8'))
+        digest.update(tensor.detach().cpu().float().numpy().tobytes())
+    for ids in dataset.input_ids:
+        digest.update(len(ids).to_bytes(4, 'little'))
+        digest.update(ids.numpy().tobytes())
+    return digest.hexdigest()
+
+
+def precompute_cls_embeddings(
+    model: CodebaseCSIModel,
+    dataset: CodeDataset,
+    device: torch.device,
+    batch_size: int = 64,
+    cache_path: Optional[Path] = None
+) -> torch.Tensor:
+    """
+    Run the encoder once over the whole dataset and return [N, 768] embeddings.
+    
+    With cache_path the result is written as safetensors, keyed on a digest
+    of the encoder weights and the tokenized dataset; a later run whose
+    digest matches reloads the file instead of re-encoding.
+    """
+    digest = embeddings_digest(model, dataset)
+    if cache_path is not None and cache_path.exists():
+        try:
+            with safe_open(str(cache_path), framework='pt') as f:
+                if (f.metadata() or {}).get('digest') == digest:
+                    print(f"Loaded cached [CLS] embeddings from {cache_path}")
+                    return f.get_tensor('cls_embeddings')
+        except (OSError, SafetensorError):
+            pass
+    
+    model.eval()
+    collate = PadCollator(dataset.tokenizer.pad_token_id)
+    embeddings = torch.empty(len(dataset), model.codebert_dim, dtype=torch.float32)
+    
+    with torch.no_grad():
+        for indices in tqdm(
+            BucketBatchSampler(dataset.lengths, batch_size, shuffle=False),
+            desc='Encoding'
+        ):
+            batch = collate([dataset[i] for i in indices])
+            cls_embedding = model.encode(
+                batch['input_ids'].to(device),
+                batch['attention_mask'].to(device)
+            )
+            embeddings[indices] = cls_embedding.float().cpu()
+    
+    if cache_path is not None:
+        save_safetensors(
+            {'cls_embeddings': embeddings},
+            str(cache_path),
+            metadata={'digest': digest}
+        )
+    
+    return embeddings
+
+
 class CSILoss(nn.Module):
     """Custom loss combining MSE with consistency loss."""
     
@@ -125,39 +298,126 @@ class CSILoss(nn.Module):
         return total_loss
 
 
+def forward_batch(
+    model: CodebaseCSIModel,
+    batch: Dict[str, torch.Tensor],
+    device: torch.device
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """
+    Move a batch to device and run the model on it.
+    
+    Batches from CachedEmbeddingDataset carry a precomputed 'cls_embedding'
+    and only run the classification head.
+    
+    Returns:
+        (predictions, rule_scores, labels) on device
+    """
+    rule_scores = batch['rule_scores'].to(device, non_blocking=True)
+    metadata = batch['metadata'].to(device, non_blocking=True)
+    labels = batch['label'].to(device, non_blocking=True)
+    
+    if 'cls_embedding' in batch:
+        cls_embedding = batch['cls_embedding'].to(device, non_blocking=True)
+        predictions, confidence = model.classify(cls_embedding, rule_scores, metadata)
+    else:
+        input_ids = batch['input_ids'].to(device, non_blocking=True)
+        attention_mask = batch['attention_mask'].to(device, non_blocking=True)
+        predictions, confidence = model(input_ids, attention_mask, rule_scores, metadata)
+    
+    return predictions, rule_scores, labels
+
+
 def train_epoch(
     model: CodebaseCSIModel,
     dataloader: DataLoader,
     criterion: CSILoss,
     optimizer: optim.Optimizer,
     scheduler: optim.lr_scheduler.LambdaLR,
-    device: torch.device
+    device: torch.device,
+    amp_dtype: Optional[torch.dtype] = None,
+    scaler: Optional[torch.cuda.amp.GradScaler] = None
 ) -> float:
-    """Train for one epoch."""
+    """
+    Train for one epoch.
+    
+    Args:
+        amp_dtype: Autocast compute dtype on CUDA (torch.bfloat16 or
+            torch.float16); None trains in FP32. Weights stay FP32.
+        scaler: GradScaler, required only for torch.float16
+    """
     model.train()
     total_loss = 0.0
+    use_amp = amp_dtype is not None and device.type == 'cuda'
     
     progress_bar = tqdm(dataloader, desc='Training')
+    for batch in progress_bar:
+        # Forward pass and loss in mixed precision
+        with torch.autocast(device_type='cuda', dtype=amp_dtype, enabled=use_amp):
+            predictions, rule_scores, labels = forward_batch(model, batch, device)
+            
+            # Calculate loss
+            loss = criterion(predictions, labels, rule_scores)
+        
+        # Backward pass (FP16 needs loss scaling; BF16 does not)
+        optimizer.zero_grad()
+        if scaler is not None:
+            scaler.scale(loss).backward()
+            scaler.unscale_(optimizer)
+            torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=1.0)
+            scaler.step(optimizer)
+            scaler.update()
+        else:
+            loss.backward()
+            torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=1.0)
+            optimizer.step()
+        scheduler.step()
+        
+        total_loss += loss.item()
+        progress_bar.set_postfix({'loss': loss.item()})
+    
+    return total_loss / len(dataloader)
+
+
+def distill_epoch(
+    student: CodebaseCSIModel,
+    teacher: CodebaseCSIModel,
+    dataloader: DataLoader,
+    criterion: CSILoss,
+    optimizer: optim.Optimizer,
+    device: torch.device
+) -> float:
+    """
+    Distill the full CodeBERT teacher into the student for one epoch.
+    
+    Loss is MSE between the student and teacher [CLS] embeddings plus the
+    usual task loss on the student's predictions.
+    """
+    student.train()
+    teacher.eval()
+    mse = nn.MSELoss()
+    total_loss = 0.0
+    
+    progress_bar = tqdm(dataloader, desc='Distilling')
     for batch in progress_bar:
         # Move to device
-        input_ids = batch['input_ids'].to(device)
-        attention_mask = batch['attention_mask'].to(device)
-        rule_scores = batch['rule_scores'].to(device)
-        metadata = batch['metadata'].to(device)
-        labels = batch['label'].to(device)
+        input_ids = batch['input_ids'].to(device, non_blocking=True)
+        attention_mask = batch['attention_mask'].to(device, non_blocking=True)
+        rule_scores = batch['rule_scores'].to(device, non_blocking=True)
+        metadata = batch['metadata'].to(device, non_blocking=True)
+        labels = batch['label'].to(device, non_blocking=True)
         
-        # Forward pass
-        predictions, confidence = model(input_ids, attention_mask, rule_scores, metadata)
+        with torch.no_grad():
+            teacher_cls = teacher.encode(input_ids, attention_mask)
+        student_cls = student.encode(input_ids, attention_mask)
+        predictions, confidence = student.classify(student_cls, rule_scores, metadata)
         
-        # Calculate loss
-        loss = criterion(predictions, labels, rule_scores)
+        loss = mse(student_cls, teacher_cls) + criterion(predictions, labels, rule_scores)
         
         # Backward pass
         optimizer.zero_grad()
         loss.backward()
-        torch.nn.utils.clip_grad_norm_(model.parameters(), max_norm=1.0)
+        torch.nn.utils.clip_grad_norm_(student.parameters(), max_norm=1.0)
         optimizer.step()
-        scheduler.step()
         
         total_loss += loss.item()
         progress_bar.set_postfix({'loss': loss.item()})
@@ -172,20 +432,15 @@ def evaluate(
 ) -> Dict[str, float]:
     """Evaluate model on validation set."""
     model.eval()
+    if model.codebert.is_gradient_checkpointing:
+        model.codebert.gradient_checkpointing_disable()
     all_predictions = []
     all_labels = []
     
     with torch.no_grad():
         for batch in tqdm(dataloader, desc='Evaluating'):
-            # Move to device
-            input_ids = batch['input_ids'].to(device)
-            attention_mask = batch['attention_mask'].to(device)
-            rule_scores = batch['rule_scores'].to(device)
-            metadata = batch['metadata'].to(device)
-            labels = batch['label'].to(device)
-            
             # Forward pass
-            predictions, confidence = model(input_ids, attention_mask, rule_scores, metadata)
+            predictions, rule_scores, labels = forward_batch(model, batch, device)
             
             all_predictions.extend(predictions.cpu().numpy())
             all_labels.extend(labels.cpu().numpy())
@@ -223,6 +478,7 @@ def main():
         'data_dir': Path('data/labeled'),
         'output_dir': Path('models'),
         'batch_size': 16,
+        'phase2_batch_size': 64,  # gradient checkpointing frees activation memory
         'learning_rate': 2e-5,
         'epochs': 10,
         'warmup_steps': 500,
@@ -233,6 +489,16 @@ def main():
         'test_split': 0.1,
         'device': 'cuda' if torch.cuda.is_available() else 'cpu',
         'seed': 42,
+        'compile_head': True,
+        'amp_dtype': torch.bfloat16,
+        # Full-CodeBERT checkpoint to distill the 6-layer student from
+        'teacher_checkpoint': Path('models/codebase_csi_teacher.safetensors'),
+        'distill_epochs': 3,
+        # Full training checkpoints (optimizer/scheduler state) are large;
+        # write one every N epochs
+        'checkpoint_every': 5,
+        # Train Phase 1 on precomputed [CLS] embeddings (encoder is frozen)
+        'cache_cls_embeddings': True,
     }
     
     print("=" * 60)
@@ -250,7 +516,7 @@ def main():
     
     # Initialize tokenizer
     print("Loading tokenizer...")
-    tokenizer = RobertaTokenizer.from_pretrained('microsoft/codebert-base')
+    tokenizer = RobertaTokenizerFast.from_pretrained('microsoft/codebert-base')
     
     # Load dataset
     print("Loading dataset...")
@@ -268,17 +534,42 @@ def main():
     print(f"Train: {len(train_dataset)}, Val: {len(val_dataset)}, Test: {len(test_dataset)}")
     print()
     
-    # Create dataloaders
-    train_loader = DataLoader(train_dataset, batch_size=CONFIG['batch_size'], shuffle=True)
-    val_loader = DataLoader(val_dataset, batch_size=CONFIG['batch_size'])
-    test_loader = DataLoader(test_dataset, batch_size=CONFIG['batch_size'])
+    device = torch.device(CONFIG['device'])
+    
+    # Create dataloaders (worker processes overlap batch prep with compute)
+    num_workers = min(8, os.cpu_count() or 1)
+    loader_kwargs = {
+        'num_workers': num_workers,
+        'pin_memory': device.type == 'cuda',
+        'persistent_workers': num_workers > 0,
+        'prefetch_factor': 4 if num_workers > 0 else None,
+        'collate_fn': PadCollator(tokenizer.pad_token_id),
+    }
+    
+    def bucket_loader(subset, batch_size: int, shuffle: bool) -> DataLoader:
+        """Length-bucketed loader over a random_split subset."""
+        lengths = [dataset.lengths[i] for i in subset.indices]
+        sampler = BucketBatchSampler(lengths, batch_size, shuffle=shuffle)
+        return DataLoader(subset, batch_sampler=sampler, **loader_kwargs)
+    
+    train_loader = bucket_loader(train_dataset, CONFIG['batch_size'], shuffle=True)
+    phase2_train_loader = bucket_loader(
+        train_dataset, CONFIG['phase2_batch_size'], shuffle=True
+    )
+    val_loader = bucket_loader(val_dataset, CONFIG['batch_size'], shuffle=False)
+    test_loader = bucket_loader(test_dataset, CONFIG['batch_size'], shuffle=False)
     
     # Initialize model
     print("Initializing model...")
     model = CodebaseCSIModel()
-    device = torch.device(CONFIG['device'])
     model.to(device)
     
+    # Compile only the classifier head: its shapes are fixed, whereas
+    # compiling CodeBERT would recompile on every new sequence shape.
+    # Module.compile() keeps state_dict keys unchanged for saving.
+    if CONFIG['compile_head']:
+        model.classifier.compile()
+    
     # Count parameters
     total_params = sum(p.numel() for p in model.parameters())
     trainable_params = sum(p.numel() for p in model.parameters() if p.requires_grad)
@@ -286,6 +577,60 @@ def main():
     print(f"Trainable parameters: {trainable_params:,}")
     print()
     
+    # Initialize loss function
+    criterion = CSILoss(consistency_weight=0.3)
+    
+    # Mixed precision: only FP16 needs a gradient scaler
+    scaler = None
+    if device.type == 'cuda' and CONFIG['amp_dtype'] == torch.float16:
+        scaler = torch.cuda.amp.GradScaler()
+    
+    # Distillation phase: pull the student's [CLS] embedding towards the
+    # full CodeBERT teacher before the regular training phases
+    if CONFIG['teacher_checkpoint'].exists():
+        print("Distilling from teacher...")
+        teacher = CodebaseCSIModel(encoder_name=TEACHER_ENCODER)
+        load_checkpoint(teacher, CONFIG['teacher_checkpoint'], device)
+        teacher.to(device)
+        for param in teacher.parameters():
+            param.requires_grad = False
+        
+        distill_optimizer = optim.AdamW(
+            model.parameters(),
+            lr=CONFIG['learning_rate'],
+            weight_decay=CONFIG['weight_decay']
+        )
+        for epoch in range(CONFIG['distill_epochs']):
+            distill_loss = distill_epoch(
+                model, teacher, train_loader, criterion, distill_optimizer, device
+            )
+            print(f"Distillation epoch {epoch + 1}/{CONFIG['distill_epochs']}: "
+                  f"loss {distill_loss:.4f}")
+        
+        del teacher, distill_optimizer
+    
+    # Phase 1 trains only the head on a frozen encoder, so encode the
+    # dataset once and train/validate on the cached [CLS] embeddings
+    CONFIG['output_dir'].mkdir(exist_ok=True)
+    if CONFIG['cache_cls_embeddings']:
+        print("Precomputing [CLS] embeddings...")
+        embeddings = precompute_cls_embeddings(
+            model, dataset, device,
+            cache_path=CONFIG['output_dir'] / 'cls_embeddings.safetensors'
+        )
+        cached_dataset = CachedEmbeddingDataset(embeddings, dataset)
+        head_train_loader = DataLoader(
+            Subset(cached_dataset, train_dataset.indices),
+            batch_size=CONFIG['batch_size'],
+            shuffle=True
+        )
+        head_val_loader = DataLoader(
+            Subset(cached_dataset, val_dataset.indices),
+            batch_size=CONFIG['batch_size']
+        )
+    else:
+        head_train_loader, head_val_loader = train_loader, val_loader
+    
     # Initialize optimizer and scheduler
     optimizer = optim.AdamW(
         model.parameters(),
@@ -293,19 +638,20 @@ def main():
         weight_decay=CONFIG['weight_decay']
     )
     
-    total_steps = len(train_loader) * CONFIG['epochs']
+    phase1_epochs = min(5, CONFIG['epochs'])
+    total_steps = (
+        len(head_train_loader) * phase1_epochs +
+        len(phase2_train_loader) * (CONFIG['epochs'] - phase1_epochs)
+    )
     scheduler = get_linear_schedule_with_warmup(
         optimizer,
         num_warmup_steps=CONFIG['warmup_steps'],
         num_training_steps=total_steps
     )
     
-    # Initialize loss function
-    criterion = CSILoss(consistency_weight=0.3)
-    
     # Training loop
     best_val_f1 = 0.0
-    CONFIG['output_dir'].mkdir(exist_ok=True)
+    best_model_path = CONFIG['output_dir'] / 'codebase_csi_best.safetensors'
     
     for epoch in range(CONFIG['epochs']):
         print(f"\n{'='*60}")
@@ -317,19 +663,27 @@ def main():
             print("Phase 1: Training classifier head only")
             for param in model.codebert.parameters():
                 param.requires_grad = False
+            epoch_loader, eval_loader = head_train_loader, head_val_loader
         else:
             print("Phase 2: Fine-tuning entire model")
             for param in model.codebert.parameters():
                 param.requires_grad = True
             # Lower learning rate for fine-tuning
             optimizer.param_groups[0]['lr'] = 1e-6
+            # Recompute encoder activations in backward to fit larger batches
+            model.codebert.config.use_cache = False
+            model.codebert.gradient_checkpointing_enable()
+            epoch_loader, eval_loader = phase2_train_loader, val_loader
         
         # Train
-        train_loss = train_epoch(model, train_loader, criterion, optimizer, scheduler, device)
+        train_loss = train_epoch(
+            model, epoch_loader, criterion, optimizer, scheduler, device,
+            amp_dtype=CONFIG['amp_dtype'], scaler=scaler
+        )
         print(f"Train Loss: {train_loss:.4f}")
         
         # Evaluate
-        val_metrics = evaluate(model, val_loader, device)
+        val_metrics = evaluate(model, eval_loader, device)
         print(f"\nValidation Metrics:")
         print(f"  Accuracy:  {val_metrics['accuracy']:.4f}")
         print(f"  Precision: {val_metrics['precision']:.4f}")
@@ -341,20 +695,20 @@ def main():
         # Save best model
         if val_metrics['f1_score'] > best_val_f1:
             best_val_f1 = val_metrics['f1_score']
-            model_path = CONFIG['output_dir'] / 'codebase_csi_best.pt'
-            torch.save(model.state_dict(), model_path)
-            print(f"\n✅ Saved best model to {model_path}")
+            save_safetensors(model.state_dict(), str(best_model_path))
+            print(f"\n✅ Saved best model to {best_model_path}")
         
         # Save checkpoint
-        checkpoint_path = CONFIG['output_dir'] / f'checkpoint_epoch_{epoch + 1}.pt'
-        torch.save({
-            'epoch': epoch + 1,
-            'model_state_dict': model.state_dict(),
-            'optimizer_state_dict': optimizer.state_dict(),
-            'scheduler_state_dict': scheduler.state_dict(),
-            'train_loss': train_loss,
-            'val_metrics': val_metrics,
-        }, checkpoint_path)
+        if (epoch + 1) % CONFIG['checkpoint_every'] == 0 or epoch + 1 == CONFIG['epochs']:
+            checkpoint_path = CONFIG['output_dir'] / f'checkpoint_epoch_{epoch + 1}.pt'
+            torch.save({
+                'epoch': epoch + 1,
+                'model_state_dict': model.state_dict(),
+                'optimizer_state_dict': optimizer.state_dict(),
+                'scheduler_state_dict': scheduler.state_dict(),
+                'train_loss': train_loss,
+                'val_metrics': val_metrics,
+            }, checkpoint_path)
     
     # Final evaluation on test set
     print(f"\n{'='*60}")
@@ -362,7 +716,7 @@ def main():
     print(f"{'='*60}")
     
     # Load best model
-    model.load_state_dict(torch.load(CONFIG['output_dir'] / 'codebase_csi_best.pt'))
+    load_checkpoint(model, best_model_path, device)
     test_metrics = evaluate(model, test_loader, device)
     
     print(f"\nTest Metrics:")
@@ -377,7 +731,7 @@ def main():
     with open(CONFIG['output_dir'] / 'test_metrics.json', 'w') as f:
         json.dump(test_metrics, f, indent=2)
     
-    print(f"\n✅ Training complete! Best model saved to {CONFIG['output_dir'] / 'codebase_csi_best.pt'}")
+    print(f"\n✅ Training complete! Best model saved to {best_model_path}")
 
 
 if __name__ == '__main__':
@@ -27,14 +27,28 @@ Research-backed patterns from:
 Target Accuracy: 85%+
 """
 
+import copy
+import hashlib
+import heapq
 import re
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
 from pathlib import Path
-from typing import List, Dict, Set, Tuple, Optional, FrozenSet
+from types import MappingProxyType
+from typing import List, Dict, Set, Tuple, Optional, FrozenSet, Mapping, Iterable
 from dataclasses import dataclass, field
-from collections import Counter
+from collections import Counter, OrderedDict
 
+from codebase_csi.utils.linear_regex import compile_linear
+from codebase_csi.utils.parallel import analyze_in_processes
 
-@dataclass(frozen=True)
+# Slotted matches drop the per-instance __dict__. dataclass(slots=True) needs
+# 3.10, and frozen slotted instances only unpickle correctly from 3.11.
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 11) else {}
+
+
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class AntipatternMatch:
     """Represents a detected antipattern (immutable for hashability)."""
     antipattern_type: str
@@ -84,6 +98,13 @@ class AntipatternAnalyzer:
         (r'"[\w-]+"\s*:\s*"[\d.]*[-.]?unstable[\d.-]*"', 'unstable_version', 0.95),
     )
     
+    # Substrings (lower-case) every UNSTABLE_VERSION_PATTERNS entry requires;
+    # lines containing none of them cannot match
+    UNSTABLE_VERSION_TOKENS: Tuple[str, ...] = (
+        'alpha', 'alfa', 'beta', 'rc', 'dev', 'preview', 'canary',
+        'nightly', 'unstable', 'experimental', '0.0.',
+    )
+    
     # Bleeding edge framework/library patterns
     BLEEDING_EDGE_IMPORTS: FrozenSet[str] = frozenset({
         # Experimental Python features
@@ -114,6 +135,12 @@ class AntipatternAnalyzer:
         (r'FEATURE_FLAG_.*UNSTABLE', 'unstable_feature_flag', 0.88),
     )
     
+    # Literals that every EXPERIMENTAL_API_PATTERNS entry requires (matched
+    # case-insensitively); lines without any of them skip the regex phase
+    EXPERIMENTAL_API_KEYWORDS: Tuple[str, ...] = (
+        'experimental', 'beta', 'unstable', 'deprecated', 'todo', 'hack',
+    )
+    
     # Dependency files to check
     DEPENDENCY_FILES: FrozenSet[str] = frozenset({
         'requirements.txt', 'requirements-dev.txt', 'requirements-test.txt',
@@ -124,6 +151,39 @@ class AntipatternAnalyzer:
         'Gemfile', 'composer.json',
     })
     
+    # Bleeding edge severity tiers (anything else is MEDIUM)
+    CRITICAL_BLEEDING_EDGE: FrozenSet[str] = frozenset({
+        'unstable_version', 'nightly_version', 'experimental_version',
+    })
+    HIGH_BLEEDING_EDGE: FrozenSet[str] = frozenset({
+        'alpha_version', 'dev_version', 'canary_version',
+        'experimental_decorator', 'dunder_experimental',
+    })
+    
+    # Remediation advice per bleeding edge pattern
+    BLEEDING_EDGE_SUGGESTIONS: Mapping[str, str] = MappingProxyType({
+        'alpha_version': "Alpha versions are unstable. Wait for stable release or pin to last stable version.",
+        'beta_version': "Beta versions may have bugs. Consider waiting for stable release.",
+        'release_candidate': "RC versions are near-stable but may still have issues. Monitor for stable release.",
+        'dev_version': "Dev versions are for development only. Use stable version in production.",
+        'preview_version': "Preview versions are for evaluation. Not recommended for production.",
+        'canary_version': "Canary versions have latest changes but may be unstable.",
+        'nightly_version': "Nightly builds are experimental. Use stable version instead.",
+        'unstable_version': "Explicitly unstable. Do not use in production.",
+        'experimental_version': "Experimental features may change or be removed.",
+        'zero_zero_version': "0.0.x versions indicate very early development stage.",
+        'early_version': "0.x versions may have breaking changes. Pin version carefully.",
+        'experimental_decorator': "Experimental APIs may change without notice.",
+        'beta_decorator': "Beta APIs are not yet stable.",
+        'unstable_decorator': "Unstable APIs should not be used in production.",
+        'using_deprecated_api': "Replace deprecated API with recommended alternative.",
+        'hack_workaround': "Document workaround and track upstream fix.",
+        'fixme_unstable': "Track and fix stability issues.",
+        'experimental_flag': "Feature flags for experimental features indicate risk.",
+        'beta_flag': "Beta feature flags should be monitored.",
+        'unstable_feature_flag': "Unstable feature flags should be disabled in production.",
+    })
+    
     # ═══════════════════════════════════════════════════════════════════════════
     # GOLD PLATING DETECTION - Software Design Antipattern
     # ═══════════════════════════════════════════════════════════════════════════
@@ -224,6 +284,34 @@ class AntipatternAnalyzer:
          'feature_flag_definition', 0.50),
     )
     
+    # Remediation advice per gold plating pattern
+    GOLD_PLATING_SUGGESTIONS: Mapping[str, str] = MappingProxyType({
+        'single_factory': "Abstract Factory without multiple implementations is over-engineering. Use simple factory method.",
+        'simple_object_builder': "Builder pattern for simple objects adds unnecessary complexity. Use constructor or factory.",
+        'single_strategy': "Strategy pattern with single strategy is premature abstraction. Use direct implementation.",
+        'interface_definition': "Interface without multiple implementations may be premature. YAGNI principle.",
+        'deep_inheritance': "Prefer composition over deep inheritance. Flatter hierarchies are easier to maintain.",
+        'visitor_pattern': "Visitor pattern is complex. Ensure the complexity is justified.",
+        'simple_adapter': "Simple adapter that just delegates may be unnecessary indirection.",
+        'pass_only_function': "Empty function suggests incomplete implementation or dead code. Remove or implement.",
+        'empty_except': "Empty except block hides errors. Log or handle the exception.",
+        'commented_code': "Commented code should be removed. Use version control for history.",
+        'todo_remove_unused': "Remove unused code rather than leaving it commented.",
+        'not_implemented': "NotImplementedError suggests incomplete design. Implement or remove.",
+        'manual_cache': "Manual caching is error-prone. Use @lru_cache or dedicated caching library.",
+        'unbounded_cache': "Unbounded cache can cause memory issues. Set appropriate maxsize.",
+        'optimization_comment': "Premature optimization is the root of all evil. Profile first.",
+        'slots_usage': "__slots__ is micro-optimization. Use only after profiling shows benefit.",
+        'nested_comprehension': "Deeply nested comprehensions are hard to read. Use explicit loops.",
+        'bit_manipulation': "Bit manipulation for non-performance-critical code reduces readability.",
+        'pass_through_delegation': "Pass-through delegation adds indirection without value.",
+        'single_method_class': "Class with single method should probably be a function.",
+        'abc_import': "ABC/abstractmethod is powerful but can lead to over-abstraction.",
+        'protocol_import': "Protocol is useful for structural typing but can be overused.",
+        'pattern_overload': "Too many design patterns in one file suggests over-engineering.",
+        'feature_flag_overload': "Too many feature flags increase code complexity and maintenance burden.",
+    })
+    
     # ═══════════════════════════════════════════════════════════════════════════
     # MAGIC NUMBERS ENHANCEMENT - Programming Antipattern
     # ═══════════════════════════════════════════════════════════════════════════
@@ -251,49 +339,181 @@ class AntipatternAnalyzer:
         (r'(?:sleep|delay|wait)\s*\(\s*\d+(?:\.\d+)?\s*\)', 'sleep_magic', 0.72),
     )
     
+    # Literals that every DOMAIN_MAGIC_PATTERNS entry requires
+    DOMAIN_MAGIC_KEYWORDS: Tuple[str, ...] = (
+        '==', 'port', 'timeout', 'retr', 'buffer', 'sleep', 'delay', 'wait',
+    )
+    
+    # Remediation advice per magic number pattern
+    MAGIC_NUMBER_SUGGESTIONS: Mapping[str, str] = MappingProxyType({
+        'http_status_magic': "Use HTTP status constants (e.g., status.HTTP_200_OK or HTTPStatus.OK).",
+        'port_magic': "Extract port numbers to configuration or named constants.",
+        'timeout_magic': "Extract timeout values to named constants (e.g., DEFAULT_TIMEOUT_SECONDS).",
+        'retry_magic': "Extract retry counts to named constants (e.g., MAX_RETRY_ATTEMPTS).",
+        'buffer_size_magic': "Extract buffer sizes to named constants (e.g., DEFAULT_BUFFER_SIZE).",
+        'sleep_magic': "Extract delay values to named constants (e.g., POLLING_INTERVAL_SECONDS).",
+    })
+    
+    # Line-comment prefixes per language (unlisted languages use the default)
+    COMMENT_PREFIXES: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+        **dict.fromkeys(('python', 'ruby', 'perl', 'shell', 'bash'), ('#',)),
+        **dict.fromkeys(
+            ('javascript', 'typescript', 'java', 'c', 'cpp', 'csharp', 'go', 'rust'),
+            ('//', '/*', '*'),
+        ),
+    })
+    DEFAULT_COMMENT_PREFIXES: Tuple[str, ...] = ('#', '//')
+    
+    # Confidence weight and top-issue rank per severity
+    SEVERITY_WEIGHTS: Mapping[str, float] = MappingProxyType({
+        'CRITICAL': 1.0, 'HIGH': 0.75, 'MEDIUM': 0.5, 'LOW': 0.25,
+    })
+    SEVERITY_ORDER: Mapping[str, int] = MappingProxyType({
+        'CRITICAL': 0, 'HIGH': 1, 'MEDIUM': 2, 'LOW': 3,
+    })
+    
+    # Risk level for confidence >= each threshold (below the first: MINIMAL)
+    RISK_THRESHOLDS: Tuple[float, ...] = (0.15, 0.35, 0.55, 0.75)
+    RISK_LEVELS: Tuple[str, ...] = ('MINIMAL', 'LOW', 'MEDIUM', 'HIGH', 'CRITICAL')
+    
     # ═══════════════════════════════════════════════════════════════════════════
     # INITIALIZATION
     # ═══════════════════════════════════════════════════════════════════════════
     
-    def __init__(self):
-        """Initialize with compiled patterns."""
+    def __init__(self, cache_size: int = 1024):
+        """Initialize with compiled patterns.
+        
+        Args:
+            cache_size: Number of analyze() results kept, keyed by a digest of
+                the content, so unchanged files are not re-scanned (0 disables)
+        """
+        self._ensure_compiled()
+        
+        # Newline offsets of the file being analyzed (set by analyze())
+        self._nl_offsets = array('i')
+        
+        # LRU of results keyed by (is_dependency_file, language, digest)
+        self._cache_size = cache_size
+        self._cache: 'OrderedDict[Tuple[bool, str, bytes], Dict]' = OrderedDict()
+    
+    @classmethod
+    def _ensure_compiled(cls):
+        """
+        Compile the pattern tables once per class.
+        
+        Compiled patterns are shared by all instances, so creating an
+        analyzer per file or per worker does not recompile them.
+        """
+        if cls.__dict__.get('_compiled', False):
+            return
+        
         # Compile bleeding edge patterns
-        self._unstable_version_patterns = [
+        cls._unstable_version_patterns = [
             (re.compile(pattern, re.IGNORECASE | re.MULTILINE), name, conf)
-            for pattern, name, conf in self.UNSTABLE_VERSION_PATTERNS
+            for pattern, name, conf in cls.UNSTABLE_VERSION_PATTERNS
         ]
-        self._experimental_api_patterns = [
+        cls._experimental_api_patterns = [
             (re.compile(pattern, re.IGNORECASE | re.MULTILINE), name, conf)
-            for pattern, name, conf in self.EXPERIMENTAL_API_PATTERNS
+            for pattern, name, conf in cls.EXPERIMENTAL_API_PATTERNS
         ]
         
-        # Compile gold plating patterns
-        self._over_engineering_patterns = [
-            (re.compile(pattern, re.MULTILINE | re.DOTALL), name, conf)
-            for pattern, name, conf in self.OVER_ENGINEERING_PATTERNS
+        # Compile gold plating patterns. Whole-file scans use RE2 when
+        # installed, except those RE2 cannot match like re: word boundaries
+        # (single_factory, simple_object_builder, visitor_pattern,
+        # simple_adapter, slots_usage), lookarounds (single_strategy,
+        # single_method_class) and a backreference (pass_through_delegation).
+        cls._over_engineering_patterns = [
+            (compile_linear(pattern, '(?ms)'), name, conf)
+            for pattern, name, conf in cls.OVER_ENGINEERING_PATTERNS
         ]
-        self._dead_code_patterns = [
-            (re.compile(pattern, re.MULTILINE), name, conf)
-            for pattern, name, conf in self.DEAD_CODE_PATTERNS
+        cls._dead_code_patterns = [
+            (compile_linear(pattern, '(?m)'), name, conf)
+            for pattern, name, conf in cls.DEAD_CODE_PATTERNS
         ]
-        self._premature_opt_patterns = [
-            (re.compile(pattern, re.IGNORECASE | re.MULTILINE), name, conf)
-            for pattern, name, conf in self.PREMATURE_OPTIMIZATION_PATTERNS
+        cls._premature_opt_patterns = [
+            (compile_linear(pattern, '(?im)'), name, conf)
+            for pattern, name, conf in cls.PREMATURE_OPTIMIZATION_PATTERNS
         ]
-        self._excessive_abstraction_patterns = [
-            (re.compile(pattern, re.MULTILINE | re.DOTALL), name, conf)
-            for pattern, name, conf in self.EXCESSIVE_ABSTRACTION_PATTERNS
+        cls._excessive_abstraction_patterns = [
+            (compile_linear(pattern, '(?ms)'), name, conf)
+            for pattern, name, conf in cls.EXCESSIVE_ABSTRACTION_PATTERNS
         ]
-        self._feature_flag_patterns = [
-            (re.compile(pattern, re.IGNORECASE), name, conf)
-            for pattern, name, conf in self.FEATURE_FLAG_PATTERNS
+        # Flags are upper-case constants; case folding would also count
+        # ordinary variables such as use_cache = True
+        cls._feature_flag_patterns = [
+            (compile_linear(pattern, ''), name, conf)
+            for pattern, name, conf in cls.FEATURE_FLAG_PATTERNS
         ]
         
         # Compile magic number patterns
-        self._domain_magic_patterns = [
+        cls._domain_magic_patterns = [
             (re.compile(pattern, re.IGNORECASE), name, conf)
-            for pattern, name, conf in self.DOMAIN_MAGIC_PATTERNS
+            for pattern, name, conf in cls.DOMAIN_MAGIC_PATTERNS
         ]
+        
+        # Per-line phases: one alternation per phase so a line is scanned once
+        cls._unstable_version_union = cls._compile_union(
+            cls.UNSTABLE_VERSION_PATTERNS, re.IGNORECASE | re.MULTILINE
+        )
+        cls._experimental_api_union = cls._compile_union(
+            cls.EXPERIMENTAL_API_PATTERNS, re.IGNORECASE | re.MULTILINE
+        )
+        cls._domain_magic_union = cls._compile_union(
+            cls.DOMAIN_MAGIC_PATTERNS, re.IGNORECASE
+        )
+        
+        # Keyword prefilters: one scan of the file finds the candidate lines.
+        # Source files share a single scan between Phases 1 and 3.
+        cls._source_line_prefilter = re.compile(
+            '|'.join(map(re.escape, cls.EXPERIMENTAL_API_KEYWORDS + cls.DOMAIN_MAGIC_KEYWORDS)),
+            re.IGNORECASE
+        )
+        cls._domain_magic_prefilter = re.compile(
+            '|'.join(map(re.escape, cls.DOMAIN_MAGIC_KEYWORDS)), re.IGNORECASE
+        )
+        # Every DOMAIN_MAGIC_PATTERNS entry needs a digit; lines without one
+        # are rejected before the union search
+        cls._digit_pattern = re.compile(r'\d')
+        
+        cls._compiled = True
+    
+    @staticmethod
+    def _compile_union(
+        patterns: Tuple[Tuple[str, str, float], ...], flags: int
+    ) -> 're.Pattern':
+        """Fuse (pattern, name, conf) entries into one regex of named groups."""
+        return re.compile(
+            '|'.join(
+                f'(?P<{name}__{index}>{pattern})'
+                for index, (pattern, name, _) in enumerate(patterns)
+            ),
+            flags
+        )
+    
+    def _search_line(
+        self,
+        line: str,
+        union: 're.Pattern',
+        patterns: List[Tuple['re.Pattern', str, float]]
+    ) -> Optional[Tuple[str, float]]:
+        """
+        Return (pattern_name, confidence) of the first pattern matching line.
+        
+        The union finds the leftmost hit; an earlier pattern in the list may
+        still match further along the line, so those are re-checked to keep
+        list order as the tie-breaker.
+        """
+        hit = union.search(line)
+        if hit is None:
+            return None
+        
+        index = int(hit.lastgroup.rsplit('__', 1)[1])
+        for pattern, pattern_name, confidence in patterns[:index]:
+            if pattern.search(line):
+                return pattern_name, confidence
+        
+        _, pattern_name, confidence = patterns[index]
+        return pattern_name, confidence
     
     # ═══════════════════════════════════════════════════════════════════════════
     # MAIN ANALYSIS ENTRY POINT
@@ -311,182 +531,224 @@ class AntipatternAnalyzer:
         Returns:
             Dict with confidence score, antipatterns, and summary
         """
-        lines = content.split('\n')
-        matches: List[AntipatternMatch] = []
-        
         # Determine if this is a dependency file
         is_dependency_file = file_path.name in self.DEPENDENCY_FILES
         
+        if not self._cache_size:
+            return self._analyze(content, language, is_dependency_file)
+        
+        digest = hashlib.blake2b(
+            content.encode('utf-8', 'surrogatepass'), digest_size=16
+        ).digest()
+        key = (is_dependency_file, language, digest)
+        
+        result = self._cache.get(key)
+        if result is None:
+            result = self._analyze(content, language, is_dependency_file)
+            self._cache[key] = result
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+        
+        # Callers get their own copy of the lists and nested dicts, so
+        # changing a result never alters later cache hits
+        return copy.deepcopy(result)
+    
+    def _analyze(self, content: str, language: str, is_dependency_file: bool) -> Dict:
+        """Run all detection phases on content (uncached)."""
+        self._nl_offsets = array('i', [m.start() for m in re.finditer('\n', content)])
+        matches: List[AntipatternMatch] = []
+        
         # Phase 1: Bleeding Edge Detection
         if is_dependency_file:
-            matches.extend(self._detect_bleeding_edge_dependencies(content, lines, file_path))
+            matches.extend(self._detect_bleeding_edge_dependencies(content))
+            candidates = self._candidate_lines(content, self._domain_magic_prefilter)
         else:
-            matches.extend(self._detect_bleeding_edge_code(content, lines, language))
+            # One keyword scan yields the candidate lines for Phases 1 and 3
+            candidates = self._candidate_lines(content, self._source_line_prefilter)
+            matches.extend(self._detect_bleeding_edge_code(content, candidates))
         
         # Phase 2: Gold Plating Detection
-        matches.extend(self._detect_gold_plating(content, lines, language))
+        matches.extend(self._detect_gold_plating(content, language))
         
         # Phase 3: Enhanced Magic Number Detection
-        matches.extend(self._detect_domain_magic_numbers(content, lines, language))
+        matches.extend(self._detect_domain_magic_numbers(content, candidates, language))
         
         # Calculate confidence
-        confidence = self._calculate_confidence(matches, len(lines))
+        confidence = self._calculate_confidence(matches, len(self._nl_offsets) + 1)
+        
+        # Distributions are computed once and shared with the summary
+        antipattern_counts = self._count_antipatterns(matches)
+        severity_distribution = self._severity_distribution(matches)
+        category_distribution = self._category_distribution(matches)
         
         # Generate summary
-        summary = self._generate_summary(matches, confidence)
+        summary = self._generate_summary(
+            matches, confidence,
+            antipattern_counts, category_distribution, severity_distribution
+        )
         
         return {
             'confidence': confidence,
             'antipatterns': matches,
             'patterns': [self._match_to_pattern(m) for m in matches],
             'summary': summary,
-            'antipattern_counts': self._count_antipatterns(matches),
-            'severity_distribution': self._severity_distribution(matches),
-            'category_distribution': self._category_distribution(matches),
+            'antipattern_counts': antipattern_counts,
+            'severity_distribution': severity_distribution,
+            'category_distribution': category_distribution,
             'analyzer_version': '1.0',
         }
     
+    @classmethod
+    def analyze_many(
+        cls,
+        items: Iterable[Tuple[Path, str, str]],
+        max_workers: Optional[int] = None,
+        chunksize: int = 32
+    ) -> List[Dict]:
+        """
+        Analyze many files in parallel across a process pool.
+        
+        Each worker builds one analyzer (and compiles the patterns) when it
+        starts, then reuses it for every file it receives.
+        
+        Args:
+            items: (file_path, content, language) tuples
+            max_workers: Number of worker processes (default: CPU count)
+            chunksize: Number of files sent to a worker at a time
+            
+        Returns:
+            One analyze() result per item, in input order
+        """
+        return analyze_in_processes(cls, items, max_workers, chunksize)
+    
     # ═══════════════════════════════════════════════════════════════════════════
     # BLEEDING EDGE DETECTION
     # ═══════════════════════════════════════════════════════════════════════════
     
     def _detect_bleeding_edge_dependencies(
-        self, content: str, lines: List[str], file_path: Path
+        self, content: str
     ) -> List[AntipatternMatch]:
         """Detect bleeding edge patterns in dependency files."""
         matches: List[AntipatternMatch] = []
         
-        for line_num, line in enumerate(lines, 1):
-            # Skip comments
-            if line.strip().startswith('#') or line.strip().startswith('//'):
+        for line_num, line in enumerate(content.split('\n'), 1):
+            # Cheap substring gate before any regex work
+            lowered = line.lower()
+            if not any(token in lowered for token in self.UNSTABLE_VERSION_TOKENS):
                 continue
             
-            for pattern, pattern_name, confidence in self._unstable_version_patterns:
-                if pattern.search(line):
-                    severity = self._get_bleeding_edge_severity(pattern_name)
-                    matches.append(AntipatternMatch(
-                        antipattern_type='bleeding_edge',
-                        line_number=line_num,
-                        severity=severity,
-                        confidence=confidence,
-                        context=line.strip()[:100],
-                        suggestion=self._get_bleeding_edge_suggestion(pattern_name),
-                        category='organizational',
-                        subcategory=pattern_name
-                    ))
-                    break  # Only one match per line
+            # Skip comments (one strip, one tuple prefix check)
+            if line.lstrip().startswith(('#', '//')):
+                continue
+            
+            # Only one match per line
+            hit = self._search_line(
+                line, self._unstable_version_union, self._unstable_version_patterns
+            )
+            if hit:
+                pattern_name, confidence = hit
+                severity = self._get_bleeding_edge_severity(pattern_name)
+                matches.append(AntipatternMatch(
+                    antipattern_type='bleeding_edge',
+                    line_number=line_num,
+                    severity=severity,
+                    confidence=confidence,
+                    context=line.strip()[:100],
+                    suggestion=self._get_bleeding_edge_suggestion(pattern_name),
+                    category='organizational',
+                    subcategory=pattern_name
+                ))
         
         return matches
     
     def _detect_bleeding_edge_code(
-        self, content: str, lines: List[str], language: str
+        self, content: str, candidates: List[int]
     ) -> List[AntipatternMatch]:
-        """Detect bleeding edge patterns in source code."""
+        """Detect bleeding edge patterns in the candidate lines of source code."""
         matches: List[AntipatternMatch] = []
         
-        for line_num, line in enumerate(lines, 1):
-            for pattern, pattern_name, confidence in self._experimental_api_patterns:
-                match = pattern.search(line)
-                if match:
-                    severity = self._get_bleeding_edge_severity(pattern_name)
-                    matches.append(AntipatternMatch(
-                        antipattern_type='bleeding_edge',
-                        line_number=line_num,
-                        severity=severity,
-                        confidence=confidence,
-                        context=line.strip()[:100],
-                        suggestion=self._get_bleeding_edge_suggestion(pattern_name),
-                        category='organizational',
-                        subcategory=pattern_name
-                    ))
-                    break
+        for index in candidates:
+            line_num, line = index + 1, self._line_at(content, index)
+            hit = self._search_line(
+                line, self._experimental_api_union, self._experimental_api_patterns
+            )
+            if hit:
+                pattern_name, confidence = hit
+                severity = self._get_bleeding_edge_severity(pattern_name)
+                matches.append(AntipatternMatch(
+                    antipattern_type='bleeding_edge',
+                    line_number=line_num,
+                    severity=severity,
+                    confidence=confidence,
+                    context=line.strip()[:100],
+                    suggestion=self._get_bleeding_edge_suggestion(pattern_name),
+                    category='organizational',
+                    subcategory=pattern_name
+                ))
         
         return matches
     
     def _get_bleeding_edge_severity(self, pattern_name: str) -> str:
         """Get severity for bleeding edge pattern."""
-        critical_patterns = {'unstable_version', 'nightly_version', 'experimental_version'}
-        high_patterns = {'alpha_version', 'dev_version', 'canary_version', 
-                        'experimental_decorator', 'dunder_experimental'}
-        
-        if pattern_name in critical_patterns:
+        if pattern_name in self.CRITICAL_BLEEDING_EDGE:
             return 'CRITICAL'
-        elif pattern_name in high_patterns:
+        elif pattern_name in self.HIGH_BLEEDING_EDGE:
             return 'HIGH'
         else:
             return 'MEDIUM'
     
     def _get_bleeding_edge_suggestion(self, pattern_name: str) -> str:
         """Get suggestion for bleeding edge pattern."""
-        suggestions = {
-            'alpha_version': "Alpha versions are unstable. Wait for stable release or pin to last stable version.",
-            'beta_version': "Beta versions may have bugs. Consider waiting for stable release.",
-            'release_candidate': "RC versions are near-stable but may still have issues. Monitor for stable release.",
-            'dev_version': "Dev versions are for development only. Use stable version in production.",
-            'preview_version': "Preview versions are for evaluation. Not recommended for production.",
-            'canary_version': "Canary versions have latest changes but may be unstable.",
-            'nightly_version': "Nightly builds are experimental. Use stable version instead.",
-            'unstable_version': "Explicitly unstable. Do not use in production.",
-            'experimental_version': "Experimental features may change or be removed.",
-            'zero_zero_version': "0.0.x versions indicate very early development stage.",
-            'early_version': "0.x versions may have breaking changes. Pin version carefully.",
-            'experimental_decorator': "Experimental APIs may change without notice.",
-            'beta_decorator': "Beta APIs are not yet stable.",
-            'unstable_decorator': "Unstable APIs should not be used in production.",
-            'using_deprecated_api': "Replace deprecated API with recommended alternative.",
-            'hack_workaround': "Document workaround and track upstream fix.",
-            'fixme_unstable': "Track and fix stability issues.",
-            'experimental_flag': "Feature flags for experimental features indicate risk.",
-            'beta_flag': "Beta feature flags should be monitored.",
-            'unstable_feature_flag': "Unstable feature flags should be disabled in production.",
-        }
-        return suggestions.get(pattern_name, "Review and consider stable alternatives.")
+        return self.BLEEDING_EDGE_SUGGESTIONS.get(pattern_name, "Review and consider stable alternatives.")
     
     # ═══════════════════════════════════════════════════════════════════════════
     # GOLD PLATING DETECTION
     # ═══════════════════════════════════════════════════════════════════════════
     
     def _detect_gold_plating(
-        self, content: str, lines: List[str], language: str
+        self, content: str, language: str
     ) -> List[AntipatternMatch]:
         """Detect gold plating patterns."""
         matches: List[AntipatternMatch] = []
         
         # 1. Over-engineering patterns
-        matches.extend(self._detect_over_engineering(content, lines, language))
+        matches.extend(self._detect_over_engineering(content, language))
         
         # 2. Dead code patterns
-        matches.extend(self._detect_dead_code(content, lines, language))
+        matches.extend(self._detect_dead_code(content, language))
         
         # 3. Premature optimization
-        matches.extend(self._detect_premature_optimization(content, lines, language))
+        matches.extend(self._detect_premature_optimization(content, language))
         
         # 4. Excessive abstraction
-        matches.extend(self._detect_excessive_abstraction(content, lines, language))
+        matches.extend(self._detect_excessive_abstraction(content, language))
         
         # 5. Feature flag overload
-        matches.extend(self._detect_feature_flag_overload(content, lines))
+        matches.extend(self._detect_feature_flag_overload(content))
         
         return matches
     
     def _detect_over_engineering(
-        self, content: str, lines: List[str], language: str
+        self, content: str, language: str
     ) -> List[AntipatternMatch]:
         """Detect over-engineering patterns."""
         matches: List[AntipatternMatch] = []
         
         for pattern, pattern_name, confidence in self._over_engineering_patterns:
+            suggestion = self._get_gold_plating_suggestion(pattern_name)
+            
             for match in pattern.finditer(content):
-                line_num = content[:match.start()].count('\n') + 1
-                context = content[match.start():match.end()][:100]
+                line_num = self._offset_to_line(match.start())
                 
                 matches.append(AntipatternMatch(
                     antipattern_type='gold_plating',
                     line_number=line_num,
                     severity='MEDIUM',
                     confidence=confidence,
-                    context=context.replace('\n', ' ').strip(),
-                    suggestion=self._get_gold_plating_suggestion(pattern_name),
+                    context=self._match_context(content, match),
+                    suggestion=suggestion,
                     category='design',
                     subcategory=pattern_name
                 ))
@@ -494,23 +756,26 @@ class AntipatternAnalyzer:
         return matches
     
     def _detect_dead_code(
-        self, content: str, lines: List[str], language: str
+        self, content: str, language: str
     ) -> List[AntipatternMatch]:
         """Detect dead/unused code patterns."""
         matches: List[AntipatternMatch] = []
         
         for pattern, pattern_name, confidence in self._dead_code_patterns:
+            # Constant per pattern, so resolved once outside the match loop
+            severity = 'LOW' if pattern_name == 'commented_code' else 'MEDIUM'
+            suggestion = self._get_gold_plating_suggestion(pattern_name)
+            
             for match in pattern.finditer(content):
-                line_num = content[:match.start()].count('\n') + 1
-                context = match.group(0)[:100]
+                line_num = self._offset_to_line(match.start())
                 
                 matches.append(AntipatternMatch(
                     antipattern_type='gold_plating',
                     line_number=line_num,
-                    severity='LOW' if pattern_name == 'commented_code' else 'MEDIUM',
+                    severity=severity,
                     confidence=confidence,
-                    context=context.replace('\n', ' ').strip(),
-                    suggestion=self._get_gold_plating_suggestion(pattern_name),
+                    context=self._match_context(content, match),
+                    suggestion=suggestion,
                     category='design',
                     subcategory=pattern_name
                 ))
@@ -518,26 +783,26 @@ class AntipatternAnalyzer:
         return matches
     
     def _detect_premature_optimization(
-        self, content: str, lines: List[str], language: str
+        self, content: str, language: str
     ) -> List[AntipatternMatch]:
         """Detect premature optimization patterns."""
         matches: List[AntipatternMatch] = []
         
         for pattern, pattern_name, confidence in self._premature_opt_patterns:
+            # Lower severity for these - they might be legitimate
+            severity = 'LOW' if pattern_name in ('slots_usage', 'bit_manipulation', 'optimization_comment') else 'MEDIUM'
+            suggestion = self._get_gold_plating_suggestion(pattern_name)
+            
             for match in pattern.finditer(content):
-                line_num = content[:match.start()].count('\n') + 1
-                context = match.group(0)[:100]
-                
-                # Lower severity for these - they might be legitimate
-                severity = 'LOW' if pattern_name in ('slots_usage', 'bit_manipulation', 'optimization_comment') else 'MEDIUM'
+                line_num = self._offset_to_line(match.start())
                 
                 matches.append(AntipatternMatch(
                     antipattern_type='gold_plating',
                     line_number=line_num,
                     severity=severity,
                     confidence=confidence,
-                    context=context.replace('\n', ' ').strip(),
-                    suggestion=self._get_gold_plating_suggestion(pattern_name),
+                    context=self._match_context(content, match),
+                    suggestion=suggestion,
                     category='design',
                     subcategory=pattern_name
                 ))
@@ -545,34 +810,33 @@ class AntipatternAnalyzer:
         return matches
     
     def _detect_excessive_abstraction(
-        self, content: str, lines: List[str], language: str
+        self, content: str, language: str
     ) -> List[AntipatternMatch]:
         """Detect excessive abstraction patterns."""
         matches: List[AntipatternMatch] = []
         
         # Count design pattern keywords
         design_pattern_count = 0
-        for pattern, pattern_name, _ in self._excessive_abstraction_patterns:
-            count = len(pattern.findall(content))
+        for pattern, pattern_name, confidence in self._excessive_abstraction_patterns:
+            # Keywords are only counted; stream them instead of building a list
             if pattern_name == 'design_pattern_keyword':
-                design_pattern_count = count
-            elif count > 0:
-                for match in pattern.finditer(content):
-                    line_num = content[:match.start()].count('\n') + 1
-                    context = match.group(0)[:100]
-                    
-                    matches.append(AntipatternMatch(
-                        antipattern_type='gold_plating',
-                        line_number=line_num,
-                        severity='MEDIUM',
-                        confidence=self._excessive_abstraction_patterns[
-                            [p[1] for p in self.EXCESSIVE_ABSTRACTION_PATTERNS].index(pattern_name)
-                        ][2],
-                        context=context.replace('\n', ' ').strip(),
-                        suggestion=self._get_gold_plating_suggestion(pattern_name),
-                        category='design',
-                        subcategory=pattern_name
-                    ))
+                design_pattern_count = sum(1 for _ in pattern.finditer(content))
+                continue
+            
+            suggestion = self._get_gold_plating_suggestion(pattern_name)
+            for match in pattern.finditer(content):
+                line_num = self._offset_to_line(match.start())
+                
+                matches.append(AntipatternMatch(
+                    antipattern_type='gold_plating',
+                    line_number=line_num,
+                    severity='MEDIUM',
+                    confidence=confidence,
+                    context=self._match_context(content, match),
+                    suggestion=suggestion,
+                    category='design',
+                    subcategory=pattern_name
+                ))
         
         # Flag if too many design patterns in one file
         if design_pattern_count > 5:
@@ -590,7 +854,7 @@ class AntipatternAnalyzer:
         return matches
     
     def _detect_feature_flag_overload(
-        self, content: str, lines: List[str]
+        self, content: str
     ) -> List[AntipatternMatch]:
         """Detect excessive feature flags."""
         matches: List[AntipatternMatch] = []
@@ -599,7 +863,7 @@ class AntipatternAnalyzer:
         flag_checks = 0
         
         for pattern, pattern_name, _ in self._feature_flag_patterns:
-            count = len(pattern.findall(content))
+            count = sum(1 for _ in pattern.finditer(content))
             if pattern_name == 'feature_flag_definition':
                 flag_definitions = count
             else:
@@ -624,90 +888,99 @@ class AntipatternAnalyzer:
     
     def _get_gold_plating_suggestion(self, pattern_name: str) -> str:
         """Get suggestion for gold plating pattern."""
-        suggestions = {
-            'single_factory': "Abstract Factory without multiple implementations is over-engineering. Use simple factory method.",
-            'simple_object_builder': "Builder pattern for simple objects adds unnecessary complexity. Use constructor or factory.",
-            'single_strategy': "Strategy pattern with single strategy is premature abstraction. Use direct implementation.",
-            'interface_definition': "Interface without multiple implementations may be premature. YAGNI principle.",
-            'deep_inheritance': "Prefer composition over deep inheritance. Flatter hierarchies are easier to maintain.",
-            'visitor_pattern': "Visitor pattern is complex. Ensure the complexity is justified.",
-            'simple_adapter': "Simple adapter that just delegates may be unnecessary indirection.",
-            'pass_only_function': "Empty function suggests incomplete implementation or dead code. Remove or implement.",
-            'empty_except': "Empty except block hides errors. Log or handle the exception.",
-            'commented_code': "Commented code should be removed. Use version control for history.",
-            'todo_remove_unused': "Remove unused code rather than leaving it commented.",
-            'not_implemented': "NotImplementedError suggests incomplete design. Implement or remove.",
-            'manual_cache': "Manual caching is error-prone. Use @lru_cache or dedicated caching library.",
-            'unbounded_cache': "Unbounded cache can cause memory issues. Set appropriate maxsize.",
-            'optimization_comment': "Premature optimization is the root of all evil. Profile first.",
-            'slots_usage': "__slots__ is micro-optimization. Use only after profiling shows benefit.",
-            'nested_comprehension': "Deeply nested comprehensions are hard to read. Use explicit loops.",
-            'bit_manipulation': "Bit manipulation for non-performance-critical code reduces readability.",
-            'pass_through_delegation': "Pass-through delegation adds indirection without value.",
-            'single_method_class': "Class with single method should probably be a function.",
-            'abc_import': "ABC/abstractmethod is powerful but can lead to over-abstraction.",
-            'protocol_import': "Protocol is useful for structural typing but can be overused.",
-            'pattern_overload': "Too many design patterns in one file suggests over-engineering.",
-            'feature_flag_overload': "Too many feature flags increase code complexity and maintenance burden.",
-        }
-        return suggestions.get(pattern_name, "Review for potential simplification.")
+        return self.GOLD_PLATING_SUGGESTIONS.get(pattern_name, "Review for potential simplification.")
     
     # ═══════════════════════════════════════════════════════════════════════════
     # ENHANCED MAGIC NUMBER DETECTION
     # ═══════════════════════════════════════════════════════════════════════════
     
     def _detect_domain_magic_numbers(
-        self, content: str, lines: List[str], language: str
+        self, content: str, candidates: List[int], language: str
     ) -> List[AntipatternMatch]:
-        """Detect domain-specific magic numbers."""
+        """Detect domain-specific magic numbers in the candidate lines."""
         matches: List[AntipatternMatch] = []
+        # Resolve the language's comment prefixes once, not per line
+        comment_prefixes = self._comment_prefixes(language)
+        has_digit = self._digit_pattern.search
         
-        for line_num, line in enumerate(lines, 1):
+        for index in candidates:
+            line_num, line = index + 1, self._line_at(content, index)
+            if not has_digit(line):
+                continue
+            stripped = line.strip()
             # Skip comments
-            if self._is_comment_line(line.strip(), language):
+            if stripped.startswith(comment_prefixes):
                 continue
             
-            for pattern, pattern_name, confidence in self._domain_magic_patterns:
-                match = pattern.search(line)
-                if match:
-                    matches.append(AntipatternMatch(
-                        antipattern_type='magic_numbers',
-                        line_number=line_num,
-                        severity='MEDIUM',
-                        confidence=confidence,
-                        context=line.strip()[:100],
-                        suggestion=self._get_magic_number_suggestion(pattern_name),
-                        category='programming',
-                        subcategory=pattern_name
-                    ))
-                    break
+            hit = self._search_line(
+                line, self._domain_magic_union, self._domain_magic_patterns
+            )
+            if hit:
+                pattern_name, confidence = hit
+                matches.append(AntipatternMatch(
+                    antipattern_type='magic_numbers',
+                    line_number=line_num,
+                    severity='MEDIUM',
+                    confidence=confidence,
+                    context=stripped[:100],
+                    suggestion=self._get_magic_number_suggestion(pattern_name),
+                    category='programming',
+                    subcategory=pattern_name
+                ))
         
         return matches
     
     def _get_magic_number_suggestion(self, pattern_name: str) -> str:
         """Get suggestion for magic number pattern."""
-        suggestions = {
-            'http_status_magic': "Use HTTP status constants (e.g., status.HTTP_200_OK or HTTPStatus.OK).",
-            'port_magic': "Extract port numbers to configuration or named constants.",
-            'timeout_magic': "Extract timeout values to named constants (e.g., DEFAULT_TIMEOUT_SECONDS).",
-            'retry_magic': "Extract retry counts to named constants (e.g., MAX_RETRY_ATTEMPTS).",
-            'buffer_size_magic': "Extract buffer sizes to named constants (e.g., DEFAULT_BUFFER_SIZE).",
-            'sleep_magic': "Extract delay values to named constants (e.g., POLLING_INTERVAL_SECONDS).",
-        }
-        return suggestions.get(pattern_name, "Extract magic number to named constant.")
+        return self.MAGIC_NUMBER_SUGGESTIONS.get(pattern_name, "Extract magic number to named constant.")
     
     # ═══════════════════════════════════════════════════════════════════════════
     # UTILITY METHODS
     # ═══════════════════════════════════════════════════════════════════════════
     
-    def _is_comment_line(self, line: str, language: str) -> bool:
-        """Check if line is a comment."""
-        stripped = line.strip()
-        if language in ('python', 'ruby', 'perl', 'shell', 'bash'):
-            return stripped.startswith('#')
-        elif language in ('javascript', 'typescript', 'java', 'c', 'cpp', 'csharp', 'go', 'rust'):
-            return stripped.startswith('//') or stripped.startswith('/*') or stripped.startswith('*')
-        return stripped.startswith('#') or stripped.startswith('//')
+    def _offset_to_line(self, offset: int) -> int:
+        """Convert a character offset in the analyzed file to a 1-based line."""
+        return bisect_left(self._nl_offsets, offset) + 1
+    
+    def _match_context(self, content: str, match: 're.Match') -> str:
+        """
+        Return the first 100 characters of a match on one line.
+        
+        Slices content directly so long DOTALL matches are not copied whole.
+        """
+        start = match.start()
+        return content[start:min(match.end(), start + 100)].replace('\n', ' ').strip()
+    
+    def _line_at(self, content: str, index: int) -> str:
+        """Return line `index` (0-based) of content without splitting the file."""
+        newlines = self._nl_offsets
+        start = newlines[index - 1] + 1 if index else 0
+        end = newlines[index] if index < len(newlines) else len(content)
+        return content[start:end]
+    
+    def _candidate_lines(self, content: str, prefilter: 're.Pattern') -> List[int]:
+        """
+        Return 0-based indices of lines containing a prefilter keyword.
+        
+        One scan over content; after a hit the search resumes at the next
+        line, so each line is reported at most once.
+        """
+        candidates: List[int] = []
+        newlines = self._nl_offsets
+        
+        hit = prefilter.search(content)
+        while hit:
+            index = bisect_left(newlines, hit.start())
+            candidates.append(index)
+            if index == len(newlines):
+                break
+            hit = prefilter.search(content, newlines[index] + 1)
+        
+        return candidates
+    
+    def _comment_prefixes(self, language: str) -> Tuple[str, ...]:
+        """Line-comment prefixes for a language, for str.startswith."""
+        return self.COMMENT_PREFIXES.get(language, self.DEFAULT_COMMENT_PREFIXES)
     
     def _calculate_confidence(
         self, matches: List[AntipatternMatch], total_lines: int
@@ -716,12 +989,8 @@ class AntipatternAnalyzer:
         if not matches:
             return 0.0
         
-        severity_weights = {'CRITICAL': 1.0, 'HIGH': 0.75, 'MEDIUM': 0.5, 'LOW': 0.25}
-        
-        total_weight = sum(
-            severity_weights.get(m.severity, 0.5) * m.confidence
-            for m in matches
-        )
+        weight = self.SEVERITY_WEIGHTS.get
+        total_weight = sum(weight(m.severity, 0.5) * m.confidence for m in matches)
         
         # Normalize by code size
         size_factor = max(1, total_lines / 100)
@@ -731,18 +1000,23 @@ class AntipatternAnalyzer:
         return min(0.92, normalized)
     
     def _generate_summary(
-        self, matches: List[AntipatternMatch], confidence: float
+        self,
+        matches: List[AntipatternMatch],
+        confidence: float,
+        antipattern_counts: Dict[str, int],
+        category_distribution: Dict[str, int],
+        severity_distribution: Dict[str, int]
     ) -> Dict:
         """Generate analysis summary."""
         return {
             'total_antipatterns': len(matches),
             'confidence': confidence,
             'risk_level': self._get_risk_level(confidence),
-            'antipattern_distribution': self._count_antipatterns(matches),
-            'category_distribution': self._category_distribution(matches),
-            'severity_distribution': self._severity_distribution(matches),
+            'antipattern_distribution': antipattern_counts,
+            'category_distribution': category_distribution,
+            'severity_distribution': severity_distribution,
             'top_issues': self._get_top_issues(matches),
-            'recommendations': self._get_recommendations(matches),
+            'recommendations': self._get_recommendations(antipattern_counts),
         }
     
     def _count_antipatterns(self, matches: List[AntipatternMatch]) -> Dict[str, int]:
@@ -759,10 +1033,12 @@ class AntipatternAnalyzer:
     
     def _get_top_issues(self, matches: List[AntipatternMatch], limit: int = 5) -> List[Dict]:
         """Get top issues sorted by severity and confidence."""
-        severity_order = {'CRITICAL': 0, 'HIGH': 1, 'MEDIUM': 2, 'LOW': 3}
-        sorted_matches = sorted(
+        rank = self.SEVERITY_ORDER.get
+        # nsmallest == sorted()[:limit] (stable), without sorting every match
+        sorted_matches = heapq.nsmallest(
+            limit,
             matches,
-            key=lambda m: (severity_order.get(m.severity, 4), -m.confidence)
+            key=lambda m: (rank(m.severity, 4), -m.confidence)
         )
         return [
             {
@@ -773,15 +1049,13 @@ class AntipatternAnalyzer:
                 'confidence': m.confidence,
                 'context': m.context[:50],
             }
-            for m in sorted_matches[:limit]
+            for m in sorted_matches
         ]
     
-    def _get_recommendations(self, matches: List[AntipatternMatch]) -> List[str]:
-        """Generate recommendations based on detected antipatterns."""
+    def _get_recommendations(self, antipattern_counts: Dict[str, int]) -> List[str]:
+        """Generate recommendations based on detected antipattern counts."""
         recommendations = []
         
-        antipattern_counts = self._count_antipatterns(matches)
-        
         if antipattern_counts.get('bleeding_edge', 0) > 0:
             recommendations.append(
                 "Consider stabilizing dependencies. Bleeding edge technologies "
@@ -807,15 +1081,7 @@ class AntipatternAnalyzer:
     
     def _get_risk_level(self, confidence: float) -> str:
         """Determine risk level from confidence."""
-        if confidence >= 0.75:
-            return 'CRITICAL'
-        elif confidence >= 0.55:
-            return 'HIGH'
-        elif confidence >= 0.35:
-            return 'MEDIUM'
-        elif confidence >= 0.15:
-            return 'LOW'
-        return 'MINIMAL'
+        return self.RISK_LEVELS[bisect_right(self.RISK_THRESHOLDS, confidence)]
     
     def _match_to_pattern(self, match: AntipatternMatch) -> Dict:
         """Convert match to pattern dict for compatibility."""
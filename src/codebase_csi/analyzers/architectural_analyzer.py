@@ -28,14 +28,24 @@ IMPROVEMENTS v2.0:
 """
 
 import re
-import math
+import copy
+import sys
+import hashlib
 from pathlib import Path
-from typing import List, Dict, Set, Tuple, Optional, FrozenSet
+from typing import List, Dict, Set, Tuple, Optional, FrozenSet, Sequence, Iterable
 from dataclasses import dataclass, field
-from collections import Counter, defaultdict
+from array import array
+from bisect import bisect_left
+from collections import Counter, OrderedDict
 
+from codebase_csi.utils.linear_regex import compile_linear
+from codebase_csi.utils.parallel import analyze_in_processes
 
-@dataclass
+# Slotted records drop the per-instance __dict__ (dataclass slots need 3.10)
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class ArchitecturalAnomaly:
     """Represents an architectural anomaly."""
     anomaly_type: str
@@ -48,7 +58,7 @@ class ArchitecturalAnomaly:
     category: str = "architecture"
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class ClassInfo:
     """Information about a class for analysis."""
     name: str
@@ -109,38 +119,151 @@ class ArchitecturalAnalyzer:
         'utils': 7,
     }
     
+    # Confidence weight per anomaly severity
+    SEVERITY_WEIGHTS: Dict[str, float] = {
+        'CRITICAL': 1.2, 'HIGH': 0.9, 'MEDIUM': 0.6, 'LOW': 0.3,
+    }
+    
+    # Languages with class/import extraction. Everything else only gets the
+    # text-level pattern misuse checks.
+    STRUCTURAL_LANGUAGES: FrozenSet[str] = frozenset({'python', 'javascript', 'typescript'})
+    
     # ═══════════════════════════════════════════════════════════════════════════
     # PATTERN DETECTION
     # ═══════════════════════════════════════════════════════════════════════════
     
-    PYTHON_CLASS_PATTERN: re.Pattern = re.compile(
-        r'^class\s+(\w+)\s*(?:\(([^)]*)\))?:', re.MULTILINE
+    # Whole-file structure scans go through RE2 when it is installed
+    PYTHON_CLASS_PATTERN: re.Pattern = compile_linear(
+        r'^class\s+(\w+)\s*(?:\(([^)]*)\))?:', '(?m)'
+    )
+    
+    PYTHON_METHOD_PATTERN: re.Pattern = compile_linear(
+        r'^\s+def\s+(\w+)\s*\(([^)]*)\):', '(?m)'
+    )
+    
+    PYTHON_IMPORT_PATTERN: re.Pattern = compile_linear(
+        r'^(?:from\s+([\w.]+)\s+)?import\s+([\w., ]+)', '(?m)'
+    )
+    
+    JS_CLASS_PATTERN: re.Pattern = compile_linear(
+        r'^class\s+(\w+)(?:\s+extends\s+(\w+))?', '(?m)'
+    )
+    
+    # First non-blank line back at column 0 closes a top-level class
+    CLASS_END_PATTERN: re.Pattern = re.compile(r'^\S', re.MULTILINE)
+    
+    JS_IMPORT_PATTERN: re.Pattern = compile_linear(
+        r"(?:import|require)\s*\(?['\"]([^'\"]+)['\"]", '(?m)'
+    )
+    
+    # Attribute assignments and calls in one scan of a class body; the two
+    # alternatives can never overlap, so findall sees the same matches as
+    # two separate passes would. A call can only start at a word boundary
+    # (a longer word ending in the same '(' would have matched first), so \b
+    # lets the engine skip mid-word starts instead of rescanning each word.
+    # Only the call name is captured: findall yields '' for an attribute
+    # assignment and the (never empty) name for a call. Names starting with
+    # a lowercase ASCII letter, digit or '_' can never pass the isupper()
+    # check, so the engine rejects them before scanning the rest.
+    CLASS_BODY_PATTERN: re.Pattern = re.compile(
+        r'self\.\w+\s*=|\b(?![a-z0-9_])(\w+)\s*\('
     )
     
-    PYTHON_METHOD_PATTERN: re.Pattern = re.compile(
-        r'^\s+def\s+(\w+)\s*\(([^)]*)\):', re.MULTILINE
+    SERVICE_LOCATOR_PATTERN: re.Pattern = re.compile(
+        r'ServiceLocator|container\.get|injector\.get', re.IGNORECASE
     )
     
-    PYTHON_IMPORT_PATTERN: re.Pattern = re.compile(
-        r'^(?:from\s+([\w.]+)\s+)?import\s+([\w., ]+)', re.MULTILINE
+    # Lowercased literals of SERVICE_LOCATOR_PATTERN for plain substring checks
+    SERVICE_LOCATOR_MARKERS: Tuple[str, ...] = (
+        'servicelocator', 'container.get', 'injector.get',
     )
     
-    JS_CLASS_PATTERN: re.Pattern = re.compile(
-        r'^class\s+(\w+)(?:\s+extends\s+(\w+))?', re.MULTILINE
+    # Concrete infrastructure clients (DIP: depend on abstractions instead),
+    # as one alternation so each module name is scanned once
+    CONCRETE_DEPENDENCY_PATTERN: re.Pattern = re.compile(
+        r'MySQL\w*|Postgres\w*|Redis\w*|MongoDB\w*|HTTP\w*Client|SMTP\w*|FTP\w*'
     )
     
-    def __init__(self):
-        """Initialize architectural analyzer."""
-        pass
+    def __init__(self, cache_size: int = 1024):
+        """Initialize architectural analyzer.
+        
+        Args:
+            cache_size: Number of analyze() results kept, keyed by a digest of
+                the content, so unchanged files are not re-scanned (0 disables)
+        """
+        # LAYER_HIERARCHY position of each layer; earlier entries win when a
+        # path or module names several layers
+        self._layer_rank = {name: rank for rank, name in enumerate(self.LAYER_HIERARCHY)}
+        
+        # LRU of results keyed by (file layer, language, digest)
+        self._cache_size = cache_size
+        self._cache: 'OrderedDict[Tuple[Optional[str], str, bytes], Dict]' = OrderedDict()
     
     def analyze(self, file_path: Path, content: str, language: str) -> Dict:
         """Analyze code architecture for AI patterns."""
-        lines = content.split('\n')
+        # The path only matters through the layer it places the file in
+        current_layer = self._file_layer(file_path)
+        
+        if not self._cache_size:
+            return self._analyze(current_layer, content, language)
+        
+        digest = hashlib.blake2b(
+            content.encode('utf-8', 'surrogatepass'), digest_size=16
+        ).digest()
+        key = (current_layer, language, digest)
+        
+        result = self._cache.get(key)
+        if result is None:
+            result = self._analyze(current_layer, content, language)
+            self._cache[key] = result
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+        
+        # Callers get their own copy (anomalies are mutable), so changing
+        # a result never alters later cache hits
+        return copy.deepcopy(result)
+    
+    @classmethod
+    def analyze_many(
+        cls,
+        items: Iterable[Tuple[Path, str, str]],
+        max_workers: Optional[int] = None,
+        chunksize: int = 32
+    ) -> List[Dict]:
+        """
+        Analyze many files in parallel across a process pool.
+        
+        Each worker builds one analyzer when it starts and reuses it (and
+        its result cache) for every file it receives. analyze() keeps all
+        per-file state local, so nothing is shared between files.
+        
+        Args:
+            items: (file_path, content, language) tuples
+            max_workers: Number of worker processes (default: CPU count)
+            chunksize: Number of files sent to a worker at a time
+            
+        Returns:
+            One analyze() result per item, in input order
+        """
+        return analyze_in_processes(cls, items, max_workers, chunksize)
+    
+    def _analyze(self, current_layer: Optional[str], content: str, language: str) -> Dict:
+        """Run the analysis phases on content (uncached)."""
+        if language not in self.STRUCTURAL_LANGUAGES:
+            # No classes or imports to extract, so the structural phases
+            # could only come back empty
+            anomalies = self._detect_pattern_misuse(content, language)
+            return self._build_result(anomalies, [], [], content.count('\n') + 1)
+        
+        # Offsets of every newline, shared by the detectors for line lookups
+        newline_offsets = array('i', [m.start() for m in re.finditer('\n', content)])
         anomalies: List[ArchitecturalAnomaly] = []
         
         # Phase 1: Extract structural information
-        classes = self._extract_classes(content, lines, language)
-        imports = self._extract_imports(content, language)
+        classes = self._extract_classes(content, newline_offsets, language)
+        imports = self._extract_imports(content, newline_offsets, language)
         
         # Phase 2: God class detection
         anomalies.extend(self._detect_god_classes(classes))
@@ -149,18 +272,30 @@ class ArchitecturalAnalyzer:
         anomalies.extend(self._analyze_coupling(classes, imports))
         
         # Phase 4: SOLID violations
-        anomalies.extend(self._detect_solid_violations(content, lines, classes, language))
+        anomalies.extend(self._detect_solid_violations(content, newline_offsets, classes, language))
         
         # Phase 5: Layer violations (NEW in v2.0)
-        anomalies.extend(self._detect_layer_violations(file_path, imports))
+        anomalies.extend(self._detect_layer_violations(current_layer, imports))
         
         # Phase 6: Pattern misuse
-        anomalies.extend(self._detect_pattern_misuse(content, lines, language))
+        anomalies.extend(self._detect_pattern_misuse(content, language))
         
         # Phase 7: Dependency direction (NEW in v2.0)
         anomalies.extend(self._analyze_dependency_direction(classes, imports))
         
-        confidence = self._calculate_confidence(anomalies, len(lines), len(classes))
+        return self._build_result(
+            anomalies, classes, imports, len(newline_offsets) + 1
+        )
+    
+    def _build_result(
+        self,
+        anomalies: List[ArchitecturalAnomaly],
+        classes: List[ClassInfo],
+        imports: List[Tuple[str, int]],
+        total_lines: int,
+    ) -> Dict:
+        """Assemble the analyze() result dict."""
+        confidence = self._calculate_confidence(anomalies, total_lines, len(classes))
         
         return {
             'confidence': confidence,
@@ -184,7 +319,9 @@ class ArchitecturalAnalyzer:
             'analyzer_version': '2.0',
         }
     
-    def _extract_classes(self, content: str, lines: List[str], language: str) -> List[ClassInfo]:
+    def _extract_classes(
+        self, content: str, newline_offsets: Sequence[int], language: str
+    ) -> List[ClassInfo]:
         """Extract class information from code."""
         classes: List[ClassInfo] = []
         
@@ -192,7 +329,7 @@ class ArchitecturalAnalyzer:
             for match in self.PYTHON_CLASS_PATTERN.finditer(content):
                 class_name = match.group(1)
                 bases = match.group(2) or ''
-                line_num = content[:match.start()].count('\n') + 1
+                line_num = self._offset_to_line(newline_offsets, match.start())
                 
                 class_info = ClassInfo(
                     name=class_name,
@@ -201,13 +338,20 @@ class ArchitecturalAnalyzer:
                 )
                 
                 # Find class end and count methods/attributes
-                class_end = self._find_class_end(lines, line_num - 1)
-                class_content = '\n'.join(lines[line_num - 1:class_end])
+                # Slice the body straight out of content, up to the newline
+                # that ends its last line
+                class_end = self._find_class_end(content, newline_offsets, line_num - 1)
+                body_end = (
+                    newline_offsets[class_end - 1]
+                    if class_end <= len(newline_offsets) else len(content)
+                )
+                class_content = content[match.start():body_end]
                 
                 class_info.lines_of_code = class_end - line_num + 1
                 class_info.method_count = len(self.PYTHON_METHOD_PATTERN.findall(class_content))
-                class_info.attribute_count = self._count_attributes(class_content, language)
-                class_info.dependencies = self._extract_class_dependencies(class_content)
+                class_info.attribute_count, class_info.dependencies = (
+                    self._scan_class_body(class_content)
+                )
                 
                 classes.append(class_info)
         
@@ -215,7 +359,7 @@ class ArchitecturalAnalyzer:
             for match in self.JS_CLASS_PATTERN.finditer(content):
                 class_name = match.group(1)
                 base_class = match.group(2)
-                line_num = content[:match.start()].count('\n') + 1
+                line_num = self._offset_to_line(newline_offsets, match.start())
                 
                 class_info = ClassInfo(
                     name=class_name,
@@ -226,26 +370,26 @@ class ArchitecturalAnalyzer:
         
         return classes
     
-    def _extract_imports(self, content: str, language: str) -> List[Tuple[str, int]]:
+    def _extract_imports(
+        self, content: str, newline_offsets: Sequence[int], language: str
+    ) -> List[Tuple[str, int]]:
         """Extract imports with line numbers."""
-        imports: List[Tuple[str, int]] = []
-        
         if language == 'python':
-            for match in self.PYTHON_IMPORT_PATTERN.finditer(content):
-                module = match.group(1) or match.group(2).split(',')[0].strip()
-                line_num = content[:match.start()].count('\n') + 1
-                imports.append((module, line_num))
+            return [
+                (
+                    match.group(1) or match.group(2).split(',')[0].strip(),
+                    self._offset_to_line(newline_offsets, match.start()),
+                )
+                for match in self.PYTHON_IMPORT_PATTERN.finditer(content)
+            ]
         
         elif language in ['javascript', 'typescript']:
-            import_pattern = re.compile(
-                r"(?:import|require)\s*\(?['\"]([^'\"]+)['\"]", re.MULTILINE
-            )
-            for match in import_pattern.finditer(content):
-                module = match.group(1)
-                line_num = content[:match.start()].count('\n') + 1
-                imports.append((module, line_num))
+            return [
+                (match.group(1), self._offset_to_line(newline_offsets, match.start()))
+                for match in self.JS_IMPORT_PATTERN.finditer(content)
+            ]
         
-        return imports
+        return []
     
     def _detect_god_classes(self, classes: List[ClassInfo]) -> List[ArchitecturalAnomaly]:
         """Detect god classes (too many responsibilities)."""
@@ -315,7 +459,11 @@ class ArchitecturalAnalyzer:
         return anomalies
     
     def _detect_solid_violations(
-        self, content: str, lines: List[str], classes: List[ClassInfo], language: str
+        self,
+        content: str,
+        newline_offsets: Sequence[int],
+        classes: List[ClassInfo],
+        language: str,
     ) -> List[ArchitecturalAnomaly]:
         """Detect SOLID principle violations."""
         anomalies: List[ArchitecturalAnomaly] = []
@@ -342,7 +490,7 @@ class ArchitecturalAnalyzer:
                 param_count = len([p for p in params.split(',') if p.strip() and p.strip() != 'self'])
                 
                 if param_count > self.THRESHOLDS['method_params']:
-                    line_num = content[:match.start()].count('\n') + 1
+                    line_num = self._offset_to_line(newline_offsets, match.start())
                     anomalies.append(ArchitecturalAnomaly(
                         anomaly_type='long_parameter_list',
                         line_number=line_num,
@@ -356,56 +504,55 @@ class ArchitecturalAnalyzer:
         
         return anomalies
     
+    def _file_layer(self, file_path: Path) -> Optional[str]:
+        """Determine which LAYER_HIERARCHY layer a file lives in, if any."""
+        return self._first_layer([p.lower() for p in file_path.parts])
+    
     def _detect_layer_violations(
-        self, file_path: Path, imports: List[Tuple[str, int]]
+        self, current_layer: Optional[str], imports: List[Tuple[str, int]]
     ) -> List[ArchitecturalAnomaly]:
         """Detect layer violations (NEW in v2.0)."""
         anomalies: List[ArchitecturalAnomaly] = []
         
-        # Determine current file's layer
-        path_parts = [p.lower() for p in file_path.parts]
-        current_layer = None
-        current_layer_level = -1
-        
-        for layer_name, level in self.LAYER_HIERARCHY.items():
-            if layer_name in path_parts:
-                current_layer = layer_name
-                current_layer_level = level
-                break
-        
-        if current_layer_level < 0:
+        if current_layer is None:
             return anomalies
+        current_layer_level = self.LAYER_HIERARCHY[current_layer]
         
-        # Check imports for layer violations
+        # Check imports for layer violations; each module's parts are looked
+        # up in one pass instead of testing every layer against them
         for module, line_num in imports:
-            module_parts = module.lower().split('.')
-            for layer_name, level in self.LAYER_HIERARCHY.items():
-                if layer_name in module_parts:
-                    # Upper layers should not import from lower layers
-                    if level < current_layer_level:
-                        anomalies.append(ArchitecturalAnomaly(
-                            anomaly_type='layer_violation',
-                            line_number=line_num,
-                            severity='HIGH',
-                            confidence=0.80,
-                            context=f"Layer '{current_layer}' imports from '{layer_name}'",
-                            suggestion="Dependencies should flow downward. Use dependency injection.",
-                            principle='DIP',
-                            category='layers'
-                        ))
-                    break
+            layer_name = self._first_layer(module.lower().split('.'))
+            # Upper layers should not import from lower layers
+            if layer_name and self.LAYER_HIERARCHY[layer_name] < current_layer_level:
+                anomalies.append(ArchitecturalAnomaly(
+                    anomaly_type='layer_violation',
+                    line_number=line_num,
+                    severity='HIGH',
+                    confidence=0.80,
+                    context=f"Layer '{current_layer}' imports from '{layer_name}'",
+                    suggestion="Dependencies should flow downward. Use dependency injection.",
+                    principle='DIP',
+                    category='layers'
+                ))
         
         return anomalies
     
+    def _first_layer(self, parts: List[str]) -> Optional[str]:
+        """Return the part that comes first in LAYER_HIERARCHY order, if any."""
+        layer_rank = self._layer_rank
+        layers = [part for part in parts if part in layer_rank]
+        return min(layers, key=layer_rank.__getitem__) if layers else None
+    
     def _detect_pattern_misuse(
-        self, content: str, lines: List[str], language: str
+        self, content: str, language: str
     ) -> List[ArchitecturalAnomaly]:
         """Detect common pattern misuse."""
         anomalies: List[ArchitecturalAnomaly] = []
+        lowered = content.lower()
         
         # Singleton without thread safety (Python)
         if language == 'python':
-            if '_instance = None' in content and 'threading' not in content.lower():
+            if '_instance = None' in content and 'threading' not in lowered:
                 if 'Lock' not in content:
                     anomalies.append(ArchitecturalAnomaly(
                         anomaly_type='unsafe_singleton',
@@ -419,7 +566,7 @@ class ArchitecturalAnalyzer:
                     ))
         
         # Service Locator anti-pattern
-        if re.search(r'ServiceLocator|container\.get|injector\.get', content, re.IGNORECASE):
+        if self._mentions_service_locator(content, lowered):
             anomalies.append(ArchitecturalAnomaly(
                 anomaly_type='service_locator',
                 line_number=1,
@@ -433,6 +580,18 @@ class ArchitecturalAnalyzer:
         
         return anomalies
     
+    def _mentions_service_locator(self, content: str, lowered: str) -> bool:
+        """Case-insensitive SERVICE_LOCATOR_PATTERN check via substring search."""
+        if any(marker in lowered for marker in self.SERVICE_LOCATOR_MARKERS):
+            return True
+        # IGNORECASE also folds 'ſ', 'ı' and 'İ' onto ASCII letters, which
+        # lower() does not, so only their presence needs the regex
+        return (
+            not content.isascii()
+            and any(letter in content for letter in 'ſıİ')
+            and bool(self.SERVICE_LOCATOR_PATTERN.search(content))
+        )
+    
     def _analyze_dependency_direction(
         self, classes: List[ClassInfo], imports: List[Tuple[str, int]]
     ) -> List[ArchitecturalAnomaly]:
@@ -440,64 +599,55 @@ class ArchitecturalAnalyzer:
         anomalies: List[ArchitecturalAnomaly] = []
         
         # Check for concrete class dependencies
-        concrete_patterns = [
-            r'MySQL\w*', r'Postgres\w*', r'Redis\w*', r'MongoDB\w*',
-            r'HTTP\w*Client', r'SMTP\w*', r'FTP\w*',
-        ]
-        
         for module, line_num in imports:
-            for pattern in concrete_patterns:
-                if re.search(pattern, module):
-                    anomalies.append(ArchitecturalAnomaly(
-                        anomaly_type='concrete_dependency',
-                        line_number=line_num,
-                        severity='LOW',
-                        confidence=0.60,
-                        context=f"Direct dependency on concrete implementation: {module}",
-                        suggestion="Consider depending on abstractions/interfaces instead.",
-                        principle='DIP',
-                        category='dependencies'
-                    ))
-                    break
+            if self.CONCRETE_DEPENDENCY_PATTERN.search(module):
+                anomalies.append(ArchitecturalAnomaly(
+                    anomaly_type='concrete_dependency',
+                    line_number=line_num,
+                    severity='LOW',
+                    confidence=0.60,
+                    context=f"Direct dependency on concrete implementation: {module}",
+                    suggestion="Consider depending on abstractions/interfaces instead.",
+                    principle='DIP',
+                    category='dependencies'
+                ))
         
         return anomalies
     
-    def _find_class_end(self, lines: List[str], start_index: int) -> int:
-        """Find the end line of a class."""
-        if start_index >= len(lines):
-            return start_index
-        
-        start_indent = len(lines[start_index]) - len(lines[start_index].lstrip())
-        
-        for i in range(start_index + 1, len(lines)):
-            line = lines[i]
-            if not line.strip():
-                continue
-            
-            current_indent = len(line) - len(line.lstrip())
-            if current_indent <= start_indent and line.strip():
-                return i
-        
-        return len(lines)
+    def _find_class_end(
+        self, content: str, newline_offsets: Sequence[int], start_index: int
+    ) -> int:
+        """Find the end line of a class.
+        
+        PYTHON_CLASS_PATTERN only matches at column 0, so the class ends at the
+        next line starting with a non-whitespace character. The regex engine
+        scans for it instead of a per-line indent loop.
+        """
+        total_lines = len(newline_offsets) + 1
+        if start_index + 1 >= total_lines:
+            return total_lines
+        
+        match = self.CLASS_END_PATTERN.search(content, newline_offsets[start_index] + 1)
+        if match is None:
+            return total_lines
+        return bisect_left(newline_offsets, match.start())
     
-    def _count_attributes(self, class_content: str, language: str) -> int:
-        """Count class attributes."""
-        if language == 'python':
-            # Count self.* assignments
-            return len(re.findall(r'self\.(\w+)\s*=', class_content))
-        return 0
+    def _offset_to_line(self, newline_offsets: Sequence[int], offset: int) -> int:
+        """Convert a character offset to a 1-based line number."""
+        return bisect_left(newline_offsets, offset) + 1
     
-    def _extract_class_dependencies(self, class_content: str) -> Set[str]:
-        """Extract dependencies used within a class."""
+    def _scan_class_body(self, class_content: str) -> Tuple[int, Set[str]]:
+        """Count self.* assignments and collect instantiated classes."""
+        attribute_count = 0
         dependencies: Set[str] = set()
         
-        # Find instantiations
-        instantiations = re.findall(r'(\w+)\s*\(', class_content)
-        for inst in instantiations:
-            if inst[0].isupper() and inst not in ('True', 'False', 'None'):
-                dependencies.add(inst)
+        for call in self.CLASS_BODY_PATTERN.findall(class_content):
+            if not call:
+                attribute_count += 1
+            elif call[0].isupper() and call not in ('True', 'False', 'None'):
+                dependencies.add(call)
         
-        return dependencies
+        return attribute_count, dependencies
     
     def _calculate_confidence(
         self, anomalies: List[ArchitecturalAnomaly], total_lines: int, total_classes: int
@@ -506,12 +656,8 @@ class ArchitecturalAnalyzer:
         if not anomalies:
             return 0.0
         
-        severity_weights = {'CRITICAL': 1.2, 'HIGH': 0.9, 'MEDIUM': 0.6, 'LOW': 0.3}
-        
-        total_weight = sum(
-            severity_weights.get(a.severity, 0.5) * a.confidence
-            for a in anomalies
-        )
+        weight = self.SEVERITY_WEIGHTS.get
+        total_weight = sum(weight(a.severity, 0.5) * a.confidence for a in anomalies)
         
         # Normalize by code size
         code_factor = max(1, total_lines / 100 + total_classes)
@@ -28,12 +28,26 @@ IMPROVEMENTS v2.0:
 """
 
 import re
+from bisect import bisect_right
+from itertools import accumulate, groupby
+from operator import itemgetter
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional, Set, FrozenSet
+from typing import List, Dict, Tuple, Optional, Set, FrozenSet, Iterable
 from dataclasses import dataclass, field
 from collections import Counter
 
 
+def _merge_ranges(ranges: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merge overlapping or adjacent codepoint ranges into a sorted minimal list."""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
 @dataclass(frozen=True)
 class EmojiMatch:
     """Represents a detected emoji (immutable)."""
@@ -78,7 +92,26 @@ class EmojiDetector:
         (0x1F680, 0x1F6FF),  # Transport & Map Symbols
         (0x1F1E0, 0x1F1FF),  # Regional Indicators (Flags)
         (0x2702, 0x27B0),    # Dingbats
-        (0x24C2, 0x1F251),   # Enclosed characters
+        (0x1F200, 0x1F251),  # Enclosed Ideographic Supplement
+        (0x1F170, 0x1F171),  # Enclosed Alphanumeric Supplement (A, B buttons)
+        (0x1F17E, 0x1F17F),  # Enclosed Alphanumeric Supplement (O, P buttons)
+        (0x1F18E, 0x1F18E),  # Enclosed Alphanumeric Supplement (AB button)
+        (0x1F191, 0x1F19A),  # Enclosed Alphanumeric Supplement (squared words)
+        (0x2139, 0x2139),    # Information source
+        (0x24C2, 0x24C2),    # Circled M
+        (0x25AA, 0x25AB),    # Geometric Shapes (small squares)
+        (0x25B6, 0x25B6),    # Geometric Shapes (play button)
+        (0x25C0, 0x25C0),    # Geometric Shapes (reverse button)
+        (0x25FB, 0x25FE),    # Geometric Shapes (medium squares)
+        (0x2934, 0x2935),    # Supplemental Arrows-B (curved arrows)
+        (0x2B05, 0x2B07),    # Misc Symbols and Arrows (arrows)
+        (0x2B1B, 0x2B1C),    # Misc Symbols and Arrows (large squares)
+        (0x2B50, 0x2B50),    # Misc Symbols and Arrows (star)
+        (0x2B55, 0x2B55),    # Misc Symbols and Arrows (circle)
+        (0x3030, 0x3030),    # Wavy dash
+        (0x303D, 0x303D),    # Part alternation mark
+        (0x3297, 0x3297),    # Circled ideograph congratulation
+        (0x3299, 0x3299),    # Circled ideograph secret
         (0x1F900, 0x1F9FF),  # Supplemental Symbols & Pictographs
         (0x1FA70, 0x1FAFF),  # Symbols & Pictographs Extended-A
         (0x2600, 0x26FF),    # Miscellaneous Symbols
@@ -166,48 +199,69 @@ class EmojiDetector:
         '😅', '😂', '🤣', '😭', '🤔', '😎', '🤷',
     })
     
+    # ═══════════════════════════════════════════════════════════════════════════
+    # COMPILED PATTERNS (built once at class creation, shared by all instances)
+    # ═══════════════════════════════════════════════════════════════════════════
+    
+    # One character class over the merged ranges, so each character is a
+    # single lookup in a small sorted range table. A trailing VS16 (U+FE0F,
+    # emoji presentation) stays with its base character, so sequences such
+    # as '⚠️' match as one emoji and hit their AI_EMOJI_PATTERNS entry.
+    EMOJI_PATTERN: re.Pattern = re.compile(
+        '[' + ''.join(
+            f'\\U{start:08X}-\\U{end:08X}' for start, end in _merge_ranges(EMOJI_RANGES)
+        ) + ']\\uFE0F?'
+    )
+    
+    # Tokens that leave code for a comment, docstring or string, per language
+    CONTEXT_OPENER_PATTERNS: Dict[str, re.Pattern] = {
+        'python': re.compile(r'"""|\'\'\'|["\'#]'),
+        'javascript': re.compile(r'//|/\*|["\'`]'),
+        'typescript': re.compile(r'//|/\*|["\'`]'),
+        'java': re.compile(r'//|/\*|["\']'),
+        'csharp': re.compile(r'//|/\*|["\']'),
+        'ruby': re.compile(r'["\'#]'),
+    }
+    DEFAULT_CONTEXT_OPENER_PATTERN: re.Pattern = re.compile(r'["\']')
+    
+    # Opening token -> (context, closing token)
+    CONTEXT_OPENERS: Dict[str, Tuple[str, str]] = {
+        '#': ('comment', '\n'),
+        '//': ('comment', '\n'),
+        '/*': ('comment', '*/'),
+        '"""': ('docstring', '"""'),
+        "'''": ('docstring', "'''"),
+        '"': ('string', '"'),
+        "'": ('string', "'"),
+        '`': ('string', '`'),
+    }
+    
+    # Closing token -> what ends (or escapes within) that string or docstring;
+    # single-quoted strings also end, unterminated, at the end of the line
+    STRING_END_PATTERNS: Dict[str, re.Pattern] = {
+        '"': re.compile(r'\\[\s\S]|["\n]'),
+        "'": re.compile(r"\\[\s\S]|['\n]"),
+        '`': re.compile(r'\\[\s\S]|`'),
+        '"""': re.compile(r'\\[\s\S]|"""'),
+        "'''": re.compile(r"\\[\s\S]|'''"),
+    }
+    
     def __init__(self):
-        """Initialize emoji detector with compiled patterns."""
-        # Build emoji regex from Unicode ranges
-        patterns = []
-        for start, end in self.EMOJI_RANGES:
-            patterns.append(f'[\\U{start:08X}-\\U{end:08X}]')
-        
-        self.emoji_regex = re.compile('|'.join(patterns))
-        
-        # Comment patterns for different languages
-        self._comment_patterns = {
-            'python': re.compile(r'^\s*#'),
-            'javascript': re.compile(r'^\s*(?://|/\*)'),
-            'typescript': re.compile(r'^\s*(?://|/\*)'),
-            'java': re.compile(r'^\s*(?://|/\*|\*)'),
-            'ruby': re.compile(r'^\s*#'),
-        }
-        
-        # Docstring patterns
-        self._docstring_patterns = {
-            'python': re.compile(r'^\s*("""|\'\'\')')
-        }
+        """Initialize emoji detector (patterns are compiled at class level)."""
+        self.emoji_regex = self.EMOJI_PATTERN
     
     def detect_emojis_in_line(self, line: str, line_number: int, language: str = 'python') -> List[EmojiMatch]:
         """Detect all emojis in a single line with context analysis."""
-        matches = []
+        if line.isascii():
+            return []
         
-        for match in self.emoji_regex.finditer(line):
-            emoji = match.group()
-            context = self._detect_context(line, match.start(), language)
-            category = self._get_emoji_category(emoji)
-            
-            matches.append(EmojiMatch(
-                emoji=emoji,
-                line_number=line_number,
-                column=match.start(),
-                unicode_code=f'U+{ord(emoji[0]):04X}',
-                context=context,
-                category=category
-            ))
-        
-        return matches
+        matches = list(self.EMOJI_PATTERN.finditer(line))
+        contexts = self._detect_contexts(line, [m.start() for m in matches], language)
+        
+        return [
+            self._make_match(match.group(), line_number, match.start(), context)
+            for match, context in zip(matches, contexts)
+        ]
     
     def analyze(self, file_path: Path, content: str, lines: List[str], language: str = 'python') -> Dict:
         """Analyze file for emoji usage with enterprise-grade detection."""
@@ -222,47 +276,51 @@ class EmojiDetector:
             'code': 0
         }
         
-        in_block_comment = False
-        in_docstring = False
+        # One scan over the joined lines instead of one per line; a match
+        # is a single character, so it never spans two lines
+        text = '\n'.join(lines)
+        found: List[Tuple[int, EmojiMatch]] = []
+        
+        # Every emoji range lies above ASCII, so pure-ASCII files (most
+        # source) skip the Unicode scan after one C-level pass
+        matches = [] if text.isascii() else list(self.EMOJI_PATTERN.finditer(text))
         
-        for line_num, line in enumerate(lines, 1):
-            # Track block comment state
-            if '/*' in line:
-                in_block_comment = True
-            if '*/' in line:
-                in_block_comment = False
+        if matches:
+            line_starts = list(accumulate((len(line) + 1 for line in lines), initial=0))
+            offsets = [match.start() for match in matches]
+            contexts = self._detect_contexts(text, offsets, language)
             
-            # Track docstring state
-            triple_quote_count = line.count('"""') + line.count("'''")
-            if triple_quote_count % 2 == 1:
-                in_docstring = not in_docstring
+            for match, offset, context in zip(matches, offsets, contexts):
+                index = bisect_right(line_starts, offset) - 1
+                found.append((index, self._make_match(
+                    match.group(), index + 1, offset - line_starts[index], context
+                )))
+        
+        for index, group in groupby(found, key=itemgetter(0)):
+            emojis = [emoji for _, emoji in group]
+            line_num = index + 1
+            all_emojis.extend(emojis)
             
-            # Detect emojis in line
-            emojis = self.detect_emojis_in_line(line, line_num, language)
+            emoji_lines.append({
+                'line': line_num,
+                'content': lines[index].strip()[:100],
+                'emojis': [e.emoji for e in emojis],
+                'count': len(emojis),
+                'contexts': [e.context for e in emojis]
+            })
+            
+            # Count by context
+            for emoji in emojis:
+                context_counts[emoji.context] += 1
             
-            if emojis:
-                all_emojis.extend(emojis)
-                
-                emoji_lines.append({
-                    'line': line_num,
-                    'content': line.strip()[:100],
-                    'emojis': [e.emoji for e in emojis],
-                    'count': len(emojis),
-                    'contexts': [e.context for e in emojis]
-                })
-                
-                # Count by context
-                for emoji in emojis:
-                    context_counts[emoji.context] += 1
-                
-                # Detect clustering (3+ emojis on same line = cluster)
-                if len(emojis) >= 3:
-                    clusters.append(EmojiCluster(
-                        line_number=line_num,
-                        emojis=[e.emoji for e in emojis],
-                        cluster_size=len(emojis),
-                        context=emojis[0].context
-                    ))
+            # Detect clustering (3+ emojis on same line = cluster)
+            if len(emojis) >= 3:
+                clusters.append(EmojiCluster(
+                    line_number=line_num,
+                    emojis=[e.emoji for e in emojis],
+                    cluster_size=len(emojis),
+                    context=emojis[0].context
+                ))
         
         # Calculate metrics
         total_emojis = len(all_emojis)
@@ -298,65 +356,73 @@ class EmojiDetector:
             'analyzer_version': '2.0',
         }
     
+    def _make_match(self, emoji: str, line_number: int, column: int, context: str) -> EmojiMatch:
+        """Build the EmojiMatch for an emoji found at (line_number, column)."""
+        return EmojiMatch(
+            emoji=emoji,
+            line_number=line_number,
+            column=column,
+            unicode_code=f'U+{ord(emoji[0]):04X}',
+            context=context,
+            category=self._get_emoji_category(emoji)
+        )
+    
     def _detect_context(self, line: str, position: int, language: str) -> str:
-        """Detect context where emoji appears with improved accuracy."""
-        # Check if in comment
-        stripped = line.strip()
-        
-        # Line comments
-        if language in ['python', 'ruby']:
-            if stripped.startswith('#'):
-                return 'comment'
-        elif language in ['javascript', 'typescript', 'java', 'csharp']:
-            if stripped.startswith('//') or stripped.startswith('/*') or stripped.startswith('*'):
-                return 'comment'
-        
-        # Check if in docstring
-        if language == 'python':
-            before = line[:position]
-            triple_double = before.count('"""')
-            triple_single = before.count("'''")
-            if triple_double % 2 == 1 or triple_single % 2 == 1:
-                return 'docstring'
-        
-        # Check if in string literal
-        before_emoji = line[:position]
-        in_string = False
-        string_char = None
-        i = 0
-        
-        while i < len(before_emoji):
-            char = before_emoji[i]
-            
-            # Handle escape sequences
-            if i > 0 and before_emoji[i-1] == '\\':
-                i += 1
-                continue
-            
-            if char in '"\'':
-                if not in_string:
-                    in_string = True
-                    string_char = char
-                elif char == string_char:
-                    in_string = False
+        """Detect context where emoji appears, looking only at its own line."""
+        return self._detect_contexts(line, [position], language)[0]
+    
+    def _detect_contexts(self, text: str, positions: List[int], language: str) -> List[str]:
+        """
+        Classify ascending offsets into text as 'comment', 'docstring',
+        'string' or 'code'.
+        
+        One forward pass carries the lexical state across lines (block
+        comments, docstrings, template literals), jumping from one
+        state-changing token to the next, and stops at the last position.
+        """
+        opener_search = self.CONTEXT_OPENER_PATTERNS.get(
+            language, self.DEFAULT_CONTEXT_OPENER_PATTERN
+        ).search
+        openers = self.CONTEXT_OPENERS
+        string_ends = self.STRING_END_PATTERNS
+        
+        contexts: List[str] = []
+        context = 'code'
+        closer = ''
+        pos = 0
+        
+        for position in positions:
+            while pos < position:
+                if context == 'code':
+                    token = opener_search(text, pos, position)
+                    if token is None:
+                        break
+                    pos = token.end()
+                    context, closer = openers[token.group()]
+                elif context == 'comment':
+                    end = text.find(closer, pos, position)
+                    if end < 0:
+                        break
+                    pos = end + len(closer)
+                    context = 'code'
+                else:
+                    token = string_ends[closer].search(text, pos, position)
+                    if token is None:
+                        break
+                    pos = token.end()
+                    # An escape stays inside; the closer or a newline ends it
+                    if token.group()[0] != '\\':
+                        context = 'code'
             
-            i += 1
-        
-        if in_string:
-            return 'string'
-        
-        # Check for f-string
-        if re.search(r'f["\'][^"\']*$', before_emoji):
-            return 'string'
+            contexts.append(context)
+            pos = max(pos, position)
         
-        # In actual code (CRITICAL!)
-        return 'code'
+        return contexts
     
     def _get_emoji_category(self, emoji: str) -> str:
         """Get category for emoji."""
-        if emoji in self.AI_EMOJI_PATTERNS:
-            return self.AI_EMOJI_PATTERNS[emoji]['category']
-        return 'other'
+        pattern_info = self.AI_EMOJI_PATTERNS.get(emoji)
+        return pattern_info['category'] if pattern_info else 'other'
     
     def _calculate_confidence(
         self, emoji_count: int, line_count: int,
@@ -404,8 +470,9 @@ class EmojiDetector:
         
         ai_scores = []
         for e in emojis:
-            if e.emoji in self.AI_EMOJI_PATTERNS:
-                ai_scores.append(self.AI_EMOJI_PATTERNS[e.emoji]['ai_score'])
+            pattern_info = self.AI_EMOJI_PATTERNS.get(e.emoji)
+            if pattern_info:
+                ai_scores.append(pattern_info['ai_score'])
             elif e.emoji in self.HUMAN_COMMON_EMOJIS:
                 ai_scores.append(0.3)
             else:
@@ -445,10 +512,8 @@ class EmojiDetector:
         categories: Counter = Counter()
         
         for e in emojis:
-            if e.emoji in self.AI_EMOJI_PATTERNS:
-                categories[self.AI_EMOJI_PATTERNS[e.emoji]['category']] += 1
-            else:
-                categories['other'] += 1
+            pattern_info = self.AI_EMOJI_PATTERNS.get(e.emoji)
+            categories[pattern_info['category'] if pattern_info else 'other'] += 1
         
         return dict(categories)
     
@@ -488,8 +553,8 @@ class EmojiDetector:
         patterns = []
         
         for e in emojis:
-            if e.emoji in self.AI_EMOJI_PATTERNS:
-                pattern_info = self.AI_EMOJI_PATTERNS[e.emoji]
+            pattern_info = self.AI_EMOJI_PATTERNS.get(e.emoji)
+            if pattern_info:
                 weight = pattern_info['weight']
                 category = pattern_info['category']
                 ai_score = pattern_info['ai_score']
@@ -514,7 +579,10 @@ class EmojiDetector:
         return patterns
 
 
+# Shared detector for detect_emojis(); EmojiDetector holds no per-call state
+_DEFAULT_DETECTOR = EmojiDetector()
+
+
 def detect_emojis(file_path: Path, content: str, lines: List[str], language: str = 'python') -> Dict:
     """Convenience function to detect emojis."""
-    detector = EmojiDetector()
-    return detector.analyze(file_path, content, lines, language)
+    return _DEFAULT_DETECTOR.analyze(file_path, content, lines, language)
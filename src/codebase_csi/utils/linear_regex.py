@@ -0,0 +1,105 @@
+"""
+Optional linear-time regex engine for whole-file scans.
+
+Patterns compile with RE2 (no backtracking) when the ``re2`` extra is
+installed and fall back to ``re`` otherwise. RE2's ``\\w``, ``\\s``, ``\\d``
+and ``\\b`` are ASCII-only while ``re`` matches Unicode, so patterns are
+rewritten with Unicode classes before they reach RE2. Patterns that cannot
+be rewritten to match exactly what ``re`` matches stay on ``re``, so
+installing the extra never changes results.
+"""
+
+import re
+from typing import Optional
+
+try:
+    import re2
+    RE2_AVAILABLE = True
+    # Unsupported patterns fall back to re; keep RE2 from logging them to stderr
+    _RE2_OPTIONS = re2.Options()
+    _RE2_OPTIONS.log_errors = False
+except ImportError:
+    re2 = None
+    _RE2_OPTIONS = None
+    RE2_AVAILABLE = False
+
+
+# Class bodies matching what re's \w, \s and \d match in str patterns
+_WORD_CLASS = r'\p{L}\p{N}_'
+_SPACE_CLASS = (
+    r'\x{9}-\x{d}\x{1c}-\x{20}\x{85}\x{a0}\x{1680}\x{2000}-\x{200a}'
+    r'\x{2028}\x{2029}\x{202f}\x{205f}\x{3000}'
+)
+_DIGIT_CLASS = r'\p{Nd}'
+
+_SHORTHAND_CLASSES = {'w': _WORD_CLASS, 's': _SPACE_CLASS, 'd': _DIGIT_CLASS}
+
+
+def to_re2_syntax(pattern: str, inline_flags: str = '') -> Optional[str]:
+    """
+    Rewrite a re pattern so RE2 matches the same text, or return None.
+    
+    \\w, \\s and \\d (and their negations) become explicit Unicode classes.
+    Word boundaries, negated shorthands inside [...] and a non-multiline $
+    (which re also matches before a final newline) have no RE2 equivalent.
+    """
+    multiline = 'm' in inline_flags
+    out = []
+    in_class = False
+    class_start = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\' and i + 1 < len(pattern):
+            escape = pattern[i + 1]
+            lower = escape.lower()
+            if escape in 'bB':
+                return None
+            if lower in _SHORTHAND_CLASSES:
+                body = _SHORTHAND_CLASSES[lower]
+                if escape == lower:
+                    out.append(body if in_class else '[' + body + ']')
+                elif in_class:
+                    return None
+                else:
+                    out.append('[^' + body + ']')
+            else:
+                out.append(pattern[i:i + 2])
+            i += 2
+            continue
+        
+        if in_class:
+            # A ']' right after '[' or '[^' is a literal
+            if char == ']' and i > class_start:
+                in_class = False
+        elif char == '[':
+            in_class = True
+            class_start = i + 1
+            if pattern.startswith('^', class_start):
+                out.append('[^')
+                i += 2
+                class_start += 1
+                continue
+        elif char == '$' and not multiline:
+            return None
+        out.append(char)
+        i += 1
+    return inline_flags + ''.join(out)
+
+
+def compile_linear(pattern: str, inline_flags: str = '') -> 're.Pattern':
+    """
+    Compile with RE2 (linear time, no backtracking) when available.
+    
+    Flags are passed inline since the two engines take them differently.
+    RE2 rejects lookarounds and backreferences; such patterns, and those
+    to_re2_syntax() cannot rewrite, use re.
+    """
+    if RE2_AVAILABLE:
+        re2_pattern = to_re2_syntax(pattern, inline_flags)
+        if re2_pattern is not None:
+            try:
+                return re2.compile(re2_pattern, options=_RE2_OPTIONS)
+            except re2.error:
+                pass
+    return re.compile(inline_flags + pattern)
@@ -0,0 +1,53 @@
+"""
+Process-pool helpers for running an analyzer over many files.
+
+Each worker process builds one analyzer when it starts (compiling its
+patterns once) and reuses it for every file it receives.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# Per-process analyzer used by analyze_in_processes() workers
+_worker_analyzer = None
+
+
+def _init_worker(analyzer_cls: type) -> None:
+    """Create the worker's analyzer once, when the process starts."""
+    global _worker_analyzer
+    _worker_analyzer = analyzer_cls()
+
+
+def _analyze_one(item: Tuple[Path, str, str]) -> Dict:
+    """Analyze one (file_path, content, language) item in a worker."""
+    file_path, content, language = item
+    return _worker_analyzer.analyze(file_path, content, language)
+
+
+def analyze_in_processes(
+    analyzer_cls: type,
+    items: Iterable[Tuple[Path, str, str]],
+    max_workers: Optional[int] = None,
+    chunksize: int = 32
+) -> List[Dict]:
+    """
+    Run analyzer_cls().analyze() over items across a process pool.
+
+    Args:
+        analyzer_cls: Analyzer class with analyze(file_path, content, language)
+        items: (file_path, content, language) tuples
+        max_workers: Number of worker processes (default: CPU count)
+        chunksize: Number of files sent to a worker at a time
+
+    Returns:
+        One analyze() result per item, in input order
+    """
+    with ProcessPoolExecutor(
+        max_workers=max_workers or os.cpu_count(),
+        initializer=_init_worker,
+        initargs=(analyzer_cls,)
+    ) as pool:
+        return list(pool.map(_analyze_one, items, chunksize=chunksize))
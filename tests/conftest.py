@@ -0,0 +1,34 @@
+"""
+Shared fixtures.
+"""
+
+import importlib.util
+
+import pytest
+
+from codebase_csi.utils import linear_regex
+
+
+@pytest.fixture(params=['re', 're2'])
+def regex_engine(request, monkeypatch):
+    """
+    Load analyzer modules with compile_linear() forced onto one engine.
+    
+    Returns a function that executes a fresh copy of the given module, so
+    its patterns compile with the selected engine without touching the
+    already imported module.
+    """
+    use_re2 = request.param == 're2'
+    if use_re2 and not linear_regex.RE2_AVAILABLE:
+        pytest.skip("re2 is not installed")
+    monkeypatch.setattr(linear_regex, 'RE2_AVAILABLE', use_re2)
+    
+    def load(module):
+        spec = importlib.util.spec_from_file_location(
+            f"{module.__name__}_{request.param}", module.__file__
+        )
+        copy = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(copy)
+        return copy
+    
+    return load
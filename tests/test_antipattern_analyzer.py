@@ -9,9 +9,13 @@ Tests antipattern detection:
 Target: 85%+ accuracy
 """
 
+import re
+
 import pytest
 from pathlib import Path
+from codebase_csi.analyzers import antipattern_analyzer
 from codebase_csi.analyzers.antipattern_analyzer import AntipatternAnalyzer, AntipatternMatch
+from codebase_csi.utils.linear_regex import compile_linear
 
 
 @pytest.fixture
@@ -519,6 +523,19 @@ if FEATURE_FLAG_X:
         flag_matches = [p for p in result['antipatterns'] 
                        if p.subcategory == 'feature_flag_overload']
         assert len(flag_matches) >= 1
+    
+    def test_lowercase_variables_not_feature_flags(self, analyzer, temp_file):
+        """Test that ordinary lower-case variables are not counted as flags."""
+        content = "\n".join(
+            f"use_cache_{i} = True\nif use_cache_{i}:\n    run()" for i in range(8)
+        )
+        temp_file.write_text(content)
+        
+        result = analyzer.analyze(temp_file, content, 'python')
+        
+        flag_matches = [p for p in result['antipatterns'] 
+                       if p.subcategory == 'feature_flag_overload']
+        assert len(flag_matches) == 0
 
 
 class TestMagicNumbersDetection:
@@ -1035,3 +1052,105 @@ class UserService:
         # Clean code should have low confidence
         assert result['confidence'] < 0.5
         assert result['summary']['risk_level'] in ('MINIMAL', 'LOW', 'MEDIUM')
+    
+    def test_analyze_many_matches_sequential(self, analyzer):
+        """Test that parallel analysis returns the sequential results in order."""
+        items = [
+            (Path("requirements.txt"), "requests==2.0.0-beta1\n", 'text'),
+            (Path("app.py"), "@experimental\ndef f():\n    pass\n", 'python'),
+            (Path("net.py"), "port = 8080\ntime.sleep(5)\n", 'python'),
+        ]
+        
+        results = AntipatternAnalyzer.analyze_many(items, max_workers=2, chunksize=1)
+        
+        assert [r['antipatterns'] for r in results] == [
+            analyzer.analyze(*item)['antipatterns'] for item in items
+        ]
+    
+    def test_repeated_content_served_from_cache(self, analyzer, tmp_path):
+        """Test that identical content is analyzed once per file kind."""
+        content = "requests==2.0.0-beta1\n"
+        
+        first = analyzer.analyze(tmp_path / "requirements.txt", content, 'text')
+        second = analyzer.analyze(tmp_path / "other" / "requirements.txt", content, 'text')
+        as_source = analyzer.analyze(tmp_path / "notes.txt", content, 'text')
+        
+        assert second == first
+        assert second is not first
+        assert len(analyzer._cache) == 2
+        assert as_source['antipatterns'] != first['antipatterns']
+    
+    def test_mutating_result_does_not_affect_cache(self, analyzer, tmp_path):
+        """Test that callers changing a result do not corrupt later cache hits."""
+        path = tmp_path / "requirements.txt"
+        content = "requests==2.0.0-beta1\n"
+        first = analyzer.analyze(path, content, 'text')
+        expected = analyzer.analyze(path, content, 'text')
+        
+        first['antipatterns'].clear()
+        first['patterns'].append({'type': 'bogus'})
+        first['summary'].clear()
+        first['antipattern_counts'].clear()
+        
+        assert analyzer.analyze(path, content, 'text') == expected
+        assert expected['antipatterns']
+
+
+class TestRegexEngines:
+    """Test that the optional RE2 engine does not change results."""
+    
+    # Dead code and feature flags named with non-ASCII identifiers
+    NON_ASCII_CODE = '''def größe():
+    pass
+
+def höhe(x):
+    raise NotImplementedError
+
+try:
+    berechne()
+except Größenfehler:
+    pass
+
+# def alte_größe
+''' + ''.join(
+        f"ENABLE_ÄNDERUNG_{i} = True\nif ENABLE_ÄNDERUNG_{i}:\n    ändere({i})\n"
+        for i in range(6)
+    )
+    
+    def test_non_ascii_identifiers(self, regex_engine):
+        """Test that non-ASCII identifiers give the same matches with either engine."""
+        analyzer = regex_engine(antipattern_analyzer).AntipatternAnalyzer()
+        
+        result = analyzer.analyze(Path("modul.py"), self.NON_ASCII_CODE, 'python')
+        
+        assert sorted((m.line_number, m.subcategory) for m in result['antipatterns']) == [
+            (1, 'feature_flag_overload'),
+            (1, 'pass_only_function'),
+            (4, 'not_implemented'),
+            (9, 'empty_except'),
+            (12, 'commented_code'),
+        ]
+    
+    @pytest.mark.parametrize('patterns, inline_flags', [
+        (AntipatternAnalyzer.OVER_ENGINEERING_PATTERNS, '(?ms)'),
+        (AntipatternAnalyzer.DEAD_CODE_PATTERNS, '(?m)'),
+        (AntipatternAnalyzer.PREMATURE_OPTIMIZATION_PATTERNS, '(?im)'),
+        (AntipatternAnalyzer.EXCESSIVE_ABSTRACTION_PATTERNS, '(?ms)'),
+        (AntipatternAnalyzer.FEATURE_FLAG_PATTERNS, ''),
+    ])
+    def test_whole_file_patterns_match_like_re(self, regex_engine, patterns, inline_flags):
+        """Test that every whole-file pattern matches what re matches."""
+        # Non-ASCII identifiers, digits and whitespace (NBSP, ideographic space)
+        content = (
+            "class\u00a0ÜberBuilder:\n    def build(self):\n        pass\n"
+            "def größe(x):\u3000\n    pass\n"
+            "except\u2003Fehler:\n    pass\n"
+            "#\u00a0def alte_größe\n"
+            "@lru_cache(maxsize=\u0661\u0662\u0663\u0664)\n"
+            "if ENABLE_ÄNDERUNG:\n    ÄNDERUNG_WERT = True\n"
+        )
+        
+        for pattern, name, _ in patterns:
+            expected = [m.span() for m in re.finditer(inline_flags + pattern, content)]
+            actual = [m.span() for m in compile_linear(pattern, inline_flags).finditer(content)]
+            assert actual == expected, name
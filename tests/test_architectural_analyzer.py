@@ -0,0 +1,133 @@
+"""
+Tests for ArchitecturalAnalyzer result caching, parallel analysis and regex engines.
+"""
+
+import pytest
+from pathlib import Path
+from codebase_csi.analyzers import architectural_analyzer
+from codebase_csi.analyzers.architectural_analyzer import ArchitecturalAnalyzer
+
+
+# Repository-layer code importing from the presentation layer
+LAYERED_CODE = '''from presentation.views import render
+import os
+
+class OrderRepository:
+    def save(self):
+        self.db = MySQLClient()
+'''
+
+# Non-ASCII identifiers, which re's Unicode \w matches
+NON_ASCII_CODE = '''from größen.modul import Maß
+
+class Bär(Basis):
+    def größe(self):
+        return 1
+
+    def höhe(self):
+        return 2
+'''
+
+
+@pytest.fixture
+def analyzer():
+    """Create analyzer instance."""
+    return ArchitecturalAnalyzer()
+
+
+class TestResultCache:
+    """Test the content-keyed result cache."""
+    
+    def test_repeated_content_served_from_cache(self, analyzer):
+        """Test that identical content in the same layer is analyzed once."""
+        first = analyzer.analyze(Path("app/repository/orders.py"), LAYERED_CODE, 'python')
+        second = analyzer.analyze(Path("lib/repository/users.py"), LAYERED_CODE, 'python')
+        
+        assert second == first
+        assert second is not first
+        assert len(analyzer._cache) == 1
+    
+    def test_cache_keyed_on_path_layer(self, analyzer):
+        """Test that the same content in another layer is analyzed separately."""
+        in_repository = analyzer.analyze(Path("app/repository/orders.py"), LAYERED_CODE, 'python')
+        in_presentation = analyzer.analyze(Path("app/presentation/orders.py"), LAYERED_CODE, 'python')
+        
+        assert len(analyzer._cache) == 2
+        assert [a.anomaly_type for a in in_repository['anomalies']] == ['layer_violation']
+        assert in_presentation['anomalies'] == []
+    
+    def test_least_recently_used_entry_evicted(self, monkeypatch):
+        """Test that the cache keeps at most cache_size results, dropping the oldest."""
+        analyzer = ArchitecturalAnalyzer(cache_size=2)
+        analyzed = []
+        uncached = analyzer._analyze
+        monkeypatch.setattr(
+            analyzer, '_analyze',
+            lambda layer, content, language: analyzed.append(content) or uncached(layer, content, language)
+        )
+        
+        analyzer.analyze(Path("a.py"), "x = 1\n", 'python')
+        analyzer.analyze(Path("b.py"), "x = 2\n", 'python')
+        analyzer.analyze(Path("a.py"), "x = 1\n", 'python')  # hit, refreshes "x = 1"
+        analyzer.analyze(Path("c.py"), "x = 3\n", 'python')  # evicts "x = 2"
+        analyzer.analyze(Path("a.py"), "x = 1\n", 'python')  # still cached
+        analyzer.analyze(Path("b.py"), "x = 2\n", 'python')  # analyzed again
+        
+        assert len(analyzer._cache) == 2
+        assert analyzed == ["x = 1\n", "x = 2\n", "x = 3\n", "x = 2\n"]
+    
+    def test_mutating_result_does_not_affect_cache(self, analyzer):
+        """Test that callers changing a result do not corrupt later cache hits."""
+        path = Path("app/repository/orders.py")
+        first = analyzer.analyze(path, LAYERED_CODE, 'python')
+        expected = len(first['anomalies'])
+        
+        first['anomalies'][0].severity = 'LOW'
+        first['anomalies'].clear()
+        first['patterns'].clear()
+        first['summary']['anomaly_types'].clear()
+        
+        second = analyzer.analyze(path, LAYERED_CODE, 'python')
+        
+        assert len(second['anomalies']) == expected
+        assert len(second['patterns']) == expected
+        assert second['anomalies'][0].severity == 'HIGH'
+        assert second['summary']['anomaly_types'] == {'layer_violation': 1}
+    
+    def test_cache_disabled(self):
+        """Test that cache_size=0 analyzes every call without storing results."""
+        analyzer = ArchitecturalAnalyzer(cache_size=0)
+        
+        analyzer.analyze(Path("a.py"), LAYERED_CODE, 'python')
+        
+        assert len(analyzer._cache) == 0
+
+
+class TestParallelAnalysis:
+    """Test analyze_many across a process pool."""
+    
+    def test_analyze_many_matches_sequential(self, analyzer):
+        """Test that parallel analysis returns the sequential results in order."""
+        items = [
+            (Path("app/repository/orders.py"), LAYERED_CODE, 'python'),
+            (Path("app/presentation/orders.py"), LAYERED_CODE, 'python'),
+            (Path("notes.txt"), "container.get('db')\n", 'text'),
+        ]
+        
+        results = ArchitecturalAnalyzer.analyze_many(items, max_workers=2, chunksize=1)
+        
+        assert results == [analyzer.analyze(*item) for item in items]
+
+
+class TestNonAsciiIdentifiers:
+    """Test that the optional RE2 engine does not change results."""
+    
+    def test_non_ascii_class_methods_and_imports(self, regex_engine):
+        """Test that non-ASCII identifiers are found with either engine."""
+        analyzer = regex_engine(architectural_analyzer).ArchitecturalAnalyzer()
+        
+        result = analyzer.analyze(Path("app/service/bär.py"), NON_ASCII_CODE, 'python')
+        
+        assert result['summary']['classes_analyzed'] == 1
+        assert result['summary']['imports_analyzed'] == 1
+        assert result['metrics']['avg_methods_per_class'] == 2.0
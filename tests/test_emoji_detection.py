@@ -468,3 +468,136 @@ class TestEdgeCases:
         for lines, expected_count in files:
             result = self.detector.analyze(Path("test.py"), "\n".join(lines), lines)
             assert result['metrics']['total_emojis'] == expected_count
+
+
+class TestContextTracking:
+    """Test file-level context classification (state carried across lines)."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.detector = EmojiDetector()
+    
+    def _contexts(self, lines, language='python'):
+        result = self.detector.analyze(Path("test"), "\n".join(lines), lines, language)
+        return [(p['emoji'], p['context']) for p in result['patterns']]
+    
+    def test_python_trailing_comment(self):
+        """Test that an emoji after code in a trailing comment is a comment."""
+        lines = ["total = 0  # Initialize ✨", "x = 5 ➕ 3  # math"]
+        
+        assert self._contexts(lines) == [('✨', 'comment'), ('➕', 'code')]
+    
+    def test_python_multiline_docstring(self):
+        """Test that emojis on docstring body lines are docstring context."""
+        lines = [
+            'def f():',
+            '    """',
+            '    Calculate the total 💰',
+            "    It's done ✅",
+            '    """',
+            '    return 🚀',
+        ]
+        
+        assert self._contexts(lines) == [
+            ('💰', 'docstring'), ('✅', 'docstring'), ('🚀', 'code')
+        ]
+    
+    def test_python_single_quoted_triple_string(self):
+        """Test that ''' strings are tracked like \"\"\" strings."""
+        lines = ["text = '''", 'He said "hi" 🎉', "'''", "flag = 🔥"]
+        
+        assert self._contexts(lines) == [('🎉', 'docstring'), ('🔥', 'code')]
+    
+    def test_escaped_quotes_stay_in_string(self):
+        """Test that an escaped quote does not end the string."""
+        lines = ['s = "say \\"hi\\" 🚀"', "t = 'it\\'s ✅'", 'u = "a\\\\" + 🔥']
+        
+        assert self._contexts(lines) == [
+            ('🚀', 'string'), ('✅', 'string'), ('🔥', 'code')
+        ]
+    
+    def test_unterminated_string_ends_at_line_end(self):
+        """Test that an unterminated single-line string does not leak."""
+        lines = ['s = "oops', 'x = 🚀']
+        
+        assert self._contexts(lines) == [('🚀', 'code')]
+    
+    def test_javascript_line_comments(self):
+        """Test // comments, including trailing ones."""
+        lines = ["// 🚀 Initialize", "start(); // ✅ ready", "let x = 🔥;"]
+        
+        assert self._contexts(lines, 'javascript') == [
+            ('🚀', 'comment'), ('✅', 'comment'), ('🔥', 'code')
+        ]
+    
+    def test_javascript_block_comment_body(self):
+        """Test that every line of a /* */ block is a comment."""
+        lines = ["/*", " * Setup ✨", "   plain body 🔄", " */", "run(); 🎉"]
+        
+        assert self._contexts(lines, 'javascript') == [
+            ('✨', 'comment'), ('🔄', 'comment'), ('🎉', 'code')
+        ]
+    
+    def test_javascript_template_literal(self):
+        """Test that template literals span lines as strings."""
+        lines = ["const msg = `Line one", "done ✅ ${value}`;", "go(🚀);"]
+        
+        assert self._contexts(lines, 'javascript') == [('✅', 'string'), ('🚀', 'code')]
+    
+    def test_comment_markers_inside_strings(self):
+        """Test that comment markers inside strings are not comments."""
+        assert self._contexts(['s = "#" + 🚀']) == [('🚀', 'code')]
+        assert self._contexts(['s = "// not a comment" + 🚀'], 'javascript') == [('🚀', 'code')]
+    
+    def test_line_context_without_file_state(self):
+        """Test that _detect_context only looks at the given line."""
+        line = "x = 1  # done ✅"
+        assert self.detector._detect_context(line, line.index('✅'), 'python') == 'comment'
+        line = "    body text 🚀"
+        assert self.detector._detect_context(line, line.index('🚀'), 'python') == 'code'
+
+
+class TestEmojiRanges:
+    """Test which codepoints count as emojis."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.detector = EmojiDetector()
+    
+    def test_cjk_and_kana_ignored(self):
+        """Test that CJK ideographs, kana and Hangul are not emojis."""
+        lines = ["# 日本語のテキスト", "# カタカナ 한국어 中文注释"]
+        result = self.detector.analyze(Path("test.py"), "\n".join(lines), lines)
+        
+        assert result['metrics']['total_emojis'] == 0
+        assert result['confidence'] == 0.0
+    
+    def test_box_drawing_and_math_ignored(self):
+        """Test that box-drawing and math symbols are not emojis."""
+        lines = ["# ═══════════════", "# ┌─┐ │ └─┘ ≤ ≥ ∑"]
+        result = self.detector.analyze(Path("test.py"), "\n".join(lines), lines)
+        
+        assert result['metrics']['total_emojis'] == 0
+    
+    def test_emoji_outside_enclosed_blocks_still_detected(self):
+        """Test emojis listed explicitly after narrowing the enclosed range."""
+        for emoji in ['Ⓜ', '⬅', '⭐', '㊗', '🅰', '🈯']:
+            matches = self.detector.detect_emojis_in_line(f"# {emoji}", 1)
+            
+            assert [m.emoji for m in matches] == [emoji]
+    
+    def test_variation_selector_sequence_is_one_emoji(self):
+        """Test that an emoji plus VS16 (U+FE0F) matches once and hits its category."""
+        lines = ["# ⚠️ Careful", "# ✔️ Done"]
+        result = self.detector.analyze(Path("test.py"), "\n".join(lines), lines)
+        
+        assert result['metrics']['total_emojis'] == 2
+        assert [p['emoji'] for p in result['patterns']] == ['⚠️', '✔️']
+        assert result['metrics']['category_distribution'] == {'warning': 1, 'task_marker': 1}
+    
+    def test_lone_variation_selector_still_matches(self):
+        """Test that a stray U+FE0F is still reported on its own."""
+        matches = self.detector.detect_emojis_in_line("# text ️ here", 1)
+        
+        assert [m.emoji for m in matches] == ['️']
+        assert matches[0].unicode_code == 'U+FE0F'
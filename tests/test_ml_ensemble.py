@@ -0,0 +1,85 @@
+"""
+Tests for the ML ensemble (ml-integration/ml_detector.py).
+
+The ML extra (torch, transformers, safetensors, numpy) is optional, so the
+whole module is skipped when it is not installed.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip('torch')
+pytest.importorskip('transformers')
+pytest.importorskip('safetensors')
+pytest.importorskip('numpy')
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'ml-integration'))
+
+from ml_detector import EnsembleDetector, EnsembleResult  # noqa: E402
+
+
+RULE_SCORES = {
+    'pattern': 0.6,
+    'statistical': 0.7,
+    'security': 0.3,
+    'emoji': 0.8,
+    'semantic': 0.5,
+    'architectural': 0.2,
+}
+
+
+class StubMLDetector:
+    """Stands in for MLDetector: same predict/predict_batch return shape."""
+    
+    def __init__(self, ml_score: float, ml_confidence: float):
+        self.result = {'ml_score': ml_score, 'ml_confidence': ml_confidence}
+        self.batch_sizes = []
+    
+    def predict(self, code, file_path, rule_scores):
+        return dict(self.result)
+    
+    def predict_batch(self, samples):
+        self.batch_sizes.append(len(samples))
+        return [dict(self.result) for _ in samples]
+
+
+class TestEnsembleDetector:
+    """Test combining rule scores with ML predictions."""
+    
+    def test_rules_only(self):
+        """Without an ML detector the rule confidence is used as-is."""
+        result = EnsembleDetector().predict("x = 1", "a.py", RULE_SCORES)
+        
+        assert isinstance(result, EnsembleResult)
+        assert result.ml_available is False
+        assert result.ensemble_confidence == result.rule_confidence
+    
+    def test_predict_with_ml(self):
+        """High ML confidence weights the ML score at 0.7."""
+        ensemble = EnsembleDetector(StubMLDetector(ml_score=0.9, ml_confidence=0.95))
+        result = ensemble.predict("x = 1", "a.py", RULE_SCORES)
+        
+        assert result.ml_available is True
+        assert result.ml_score == 0.9
+        assert result.ml_confidence == 0.95
+        assert result.weights == {'ml': 0.7, 'rules': 0.3}
+        assert result.ensemble_confidence == pytest.approx(
+            0.7 * 0.9 + 0.3 * result.rule_confidence
+        )
+    
+    def test_predict_batch_with_ml(self):
+        """Batched prediction matches per-file prediction and respects batch_size."""
+        stub = StubMLDetector(ml_score=0.2, ml_confidence=0.6)
+        ensemble = EnsembleDetector(stub)
+        samples = [
+            {'code': f"x = {i}", 'file_path': f"f{i}.py", 'rule_scores': RULE_SCORES}
+            for i in range(5)
+        ]
+        
+        results = ensemble.predict_batch(samples, batch_size=2)
+        
+        assert stub.batch_sizes == [2, 2, 1]
+        assert results == [ensemble.predict(s['code'], s['file_path'], RULE_SCORES) for s in samples]
+        assert all(r.weights == {'ml': 0.5, 'rules': 0.5} for r in results)